@@ -1,12 +1,92 @@
 from flask import Flask, request, jsonify, render_template
 from flask_cors import CORS
-from combiner import combine_predictions_likert
-from quiz_scorer import get_question_order
+from combiner import (
+    MIN_TEXT_LENGTH, combine_predictions_explained, combine_predictions_likert,
+    combine_predictions_likert_batch, combine_quiz_scores, has_usable_text, scores_to_mbti,
+    validate_prediction_request
+)
+from quiz_scorer import get_question_bank, quiz_cache
+from predict import EXPLAIN_TOP_K, get_batcher_stats, get_model_state, text_cache, warm_up
+from metrics import count_error, count_request, registry, timed
+from profiler import ADMIN_HEADER, PROFILE_HEADER, is_admin, profiler, should_profile
+from prerender import PrerenderedResponse
+from json_codec import dumps, loads
+from sessions import MAX_TEXT_CHARS, append_text, create_session, end_session, text_sessions
+from quiz_sessions import (
+    QuestionsChangedError, QuizSessionError, answer_question, create_quiz_session, end_quiz_session,
+    get_quiz_session, quiz_sessions
+)
+import functools
 import json
+import os
 
 app = Flask(__name__)
 CORS(app)
 
+# Text models load lazily on the first text submission; set
+# ECHOTYPE_WARMUP=1 to load them in the background right after startup
+if os.environ.get('ECHOTYPE_WARMUP') == '1':
+    warm_up()
+
+def collect_service_stats():
+    """Cache and micro-batcher counters for /api/metrics, read at scrape time"""
+    caches = {'text': text_cache.stats(), 'quiz': quiz_cache.stats()}
+    families = [
+        ('echotype_cache_hits_total', 'counter', 'Cache hits', 'hits'),
+        ('echotype_cache_misses_total', 'counter', 'Cache misses', 'misses'),
+        ('echotype_cache_evictions_total', 'counter', 'Entries evicted by the LRU policy', 'evictions'),
+        ('echotype_cache_size', 'gauge', 'Entries currently cached', 'size')
+    ]
+    collected = [
+        (name, kind, help_text, [({'cache': cache}, stats[key]) for cache, stats in caches.items()])
+        for name, kind, help_text, key in families
+    ]
+    
+    batcher = get_batcher_stats()
+    if batcher is not None:
+        collected += [
+            ('echotype_batcher_queue_depth', 'gauge', 'Texts waiting for the micro-batcher',
+             [({}, batcher['queue_depth'])]),
+            ('echotype_batcher_batches_total', 'counter', 'Micro-batches run', [({}, batcher['batches'])]),
+            ('echotype_batcher_items_total', 'counter', 'Texts run through the micro-batcher',
+             [({}, batcher['items'])]),
+            ('echotype_batcher_batch_size', 'histogram', 'Texts per micro-batch',
+             [({}, batcher['batch_size'])]),
+            ('echotype_batcher_wait_seconds', 'histogram', 'Time the first text of a batch waited for company',
+             [({}, batcher['batch_wait_seconds'])])
+        ]
+    return collected
+
+registry.register_collector(collect_service_stats)
+
+# Most records one /api/predict/batch request may carry
+MAX_BATCH_RECORDS = int(os.environ.get('ECHOTYPE_MAX_BATCH_RECORDS', 1000))
+
+# Browsers and CDNs may reuse /api/questions for this long, then revalidate with the ETag
+QUESTIONS_MAX_AGE = int(os.environ.get('ECHOTYPE_QUESTIONS_MAX_AGE', 300))
+
+# test_type -> (question bank version, PrerenderedResponse)
+_rendered_questions = {}
+
+def get_rendered_questions(test_type):
+    """
+    Serialized and compressed /api/questions body for a test type
+    
+    Rendered once per question bank version, so a hot-reloaded
+    questions.json gets a new body and ETag on the next request.
+    """
+    bank = get_question_bank()
+    compiled = bank.get(test_type)
+    cached = _rendered_questions.get(test_type)
+    if cached is None or cached[0] != bank.version:
+        cached = (bank.version, PrerenderedResponse({
+            'test_type': test_type,
+            'total_questions': len(compiled.questions),
+            'questions': list(compiled.questions)
+        }))
+        _rendered_questions[test_type] = cached
+    return cached[1]
+
 # Personality type descriptions
 TYPE_DESCRIPTIONS = {
     'INTJ': 'The Architect - Strategic, independent, and highly analytical. You see patterns others miss and plan for the future.',
@@ -27,6 +107,147 @@ TYPE_DESCRIPTIONS = {
     'ESFP': 'The Entertainer - Spontaneous, energetic, and enthusiastic. You bring excitement and joy wherever you go.'
 }
 
+DIMENSION_NAMES = {
+    'I-E': ('Introversion ↔ Extraversion', 'I', 'E'),
+    'N-S': ('Intuition ↔ Sensing', 'N', 'S'),
+    'T-F': ('Thinking ↔ Feeling', 'T', 'F'),
+    'J-P': ('Judging ↔ Perceiving', 'J', 'P')
+}
+
+# Response blocks a client can select with ?fields=; the default is all of them
+PREDICTION_FIELDS = ('type', 'description', 'scores', 'dimensions')
+
+def parse_fields(value):
+    """
+    Parse the fields= query parameter
+    
+    Args:
+        value: Comma-separated field names, or None for the full response
+    
+    Returns:
+        Tuple of (fields tuple, error message or None)
+    """
+    if not value:
+        return PREDICTION_FIELDS, None
+    
+    fields = tuple(field.strip() for field in value.split(',') if field.strip())
+    unknown = [field for field in fields if field not in PREDICTION_FIELDS]
+    if unknown:
+        return None, f'Unknown fields: {", ".join(unknown)}. Use {", ".join(PREDICTION_FIELDS)}'
+    return fields, None
+
+# Upper bound for ?top_k= so explanations stay small
+MAX_EXPLAIN_TOP_K = 20
+
+def parse_explain(args):
+    """
+    Parse the explain= and top_k= query parameters
+    
+    Returns:
+        Tuple of (top_k, error message or None); top_k is 0 when no
+        explanation was requested
+    """
+    if args.get('explain', '').lower() not in ('1', 'true', 'yes'):
+        return 0, None
+    
+    try:
+        top_k = int(args.get('top_k', EXPLAIN_TOP_K))
+    except ValueError:
+        return 0, 'top_k must be an integer'
+    if not 1 <= top_k <= MAX_EXPLAIN_TOP_K:
+        return 0, f'top_k must be between 1 and {MAX_EXPLAIN_TOP_K}'
+    return top_k, None
+
+def build_prediction_response(mbti_type, scores, fields=PREDICTION_FIELDS):
+    """
+    Build the JSON body returned for one prediction
+    
+    Only the requested blocks are built; `fields=type,scores` gives the
+    compact schema of the type plus four floats.
+    """
+    response = {'success': True}
+    if 'type' in fields:
+        response['type'] = mbti_type
+    if 'description' in fields:
+        response['description'] = TYPE_DESCRIPTIONS.get(mbti_type, 'A unique personality type!')
+    if 'scores' in fields:
+        response['scores'] = {dim: float(score) for dim, score in scores.items()}
+    if 'dimensions' in fields:
+        response['dimensions'] = {
+            dim: {
+                'name': name,
+                'score': float(scores[dim]),
+                'trait': first if scores[dim] > 0.5 else second
+            }
+            for dim, (name, first, second) in DIMENSION_NAMES.items()
+        }
+    return response
+
+def validate_session_text(text):
+    """Error message for text sent to a text session, or None if it is acceptable"""
+    if not isinstance(text, str):
+        return 'Text must be a string'
+    if len(text) > MAX_TEXT_CHARS:
+        return f'Text is limited to {MAX_TEXT_CHARS} characters per request'
+    return None
+
+def build_text_session_response(session_id, result, length, content_length):
+    """JSON body for one text session update"""
+    return {
+        'success': True,
+        'session_id': session_id,
+        'length': length,
+        # Same threshold (on the stripped text) /api/predict uses before it looks at text
+        'ready': content_length >= MIN_TEXT_LENGTH,
+        'type': result['type'],
+        'dimensions': {
+            dim: {'letter': info['letter'], 'confidence': float(info['confidence'])}
+            for dim, info in result['dimensions'].items()
+        }
+    }
+
+def build_quiz_session_response(session_id, progress):
+    """JSON body for a quiz session's progress and provisional type"""
+    return {
+        'success': True,
+        'session_id': session_id,
+        'test_type': progress['test_type'],
+        'answered': progress['answered'],
+        'total_questions': progress['total_questions'],
+        'complete': progress['complete'],
+        'type': scores_to_mbti(progress['scores']),
+        'scores': progress['scores']
+    }
+
+def json_response(payload, status=200):
+    """JSON response encoded with json_codec (orjson when installed)"""
+    return app.response_class(dumps(payload), status=status, mimetype='application/json')
+
+def read_json():
+    """
+    Request body as JSON, decoded with json_codec
+    
+    Returns None for a malformed body, like asgi_app.read_json, so the
+    views answer it with the same 400 as an empty one.
+    """
+    if not request.is_json:
+        # Let Flask raise its usual error for non-JSON bodies
+        return request.json
+    try:
+        return loads(request.get_data(cache=False))
+    except ValueError:
+        return None
+
+def profiled(view):
+    """Run the view under the sampling profiler when this request is selected"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not should_profile(request.headers.get(PROFILE_HEADER)):
+            return view(*args, **kwargs)
+        with profiler.profile():
+            return view(*args, **kwargs)
+    return wrapper
+
 @app.route('/')
 def home():
     """Serve the main web interface"""
@@ -47,19 +268,21 @@ def get_questions(test_type):
         if test_type not in ['short', 'full']:
             return jsonify({'error': 'Invalid test type. Use "short" or "full"'}), 400
         
-        questions = get_question_order(test_type)
+        rendered = get_rendered_questions(test_type)
+        encoding = rendered.choose_encoding(request.headers.get('Accept-Encoding'))
+        headers = rendered.headers(encoding, QUESTIONS_MAX_AGE)
         
-        # Return questions with necessary info
-        return jsonify({
-            'test_type': test_type,
-            'total_questions': len(questions),
-            'questions': questions
-        })
+        if rendered.not_modified(request.headers.get('If-None-Match'), encoding):
+            headers.pop('Content-Encoding', None)
+            return '', 304, headers
+        
+        return app.response_class(rendered.bodies[encoding], headers=headers, mimetype='application/json')
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/predict', methods=['POST'])
+@profiled
 def predict():
     """
     Accepts quiz answers (1-5 scale) and optional text
@@ -71,66 +294,328 @@ def predict():
         "test_type": "short" or "full",
         "text": "Optional user text..."
     }
+    
+    Query parameters:
+        fields: Comma-separated blocks to return (type, description,
+                scores, dimensions); all of them by default
+        explain: 'true' adds the words that drove each dimension of the
+                 text prediction (top_k per dimension, default 5)
     """
     try:
-        data = request.json
+        fields, error = parse_fields(request.args.get('fields'))
+        if not error:
+            top_k, error = parse_explain(request.args)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        with timed('parse_json'):
+            data = read_json()
         
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
+        with timed('validate'):
+            error = validate_prediction_request(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         answers = data.get('answers')
         test_type = data.get('test_type', 'short')
         text = data.get('text', '')
+        count_request('predict', test_type, has_usable_text(text))
+        
+        # Get prediction using the updated function
+        explanation = None
+        if top_k:
+            mbti_type, scores, explanation = combine_predictions_explained(
+                answers=answers,
+                test_type=test_type,
+                text=text if has_usable_text(text) else None,
+                top_k=top_k
+            )
+        else:
+            mbti_type, scores = combine_predictions_likert(
+                answers=answers,
+                test_type=test_type,
+                text=text if has_usable_text(text) else None
+            )
+        
+        # Return results
+        with timed('serialize'):
+            response = build_prediction_response(mbti_type, scores, fields)
+            if top_k:
+                response['explanation'] = explanation
+            return json_response(response)
+    
+    except Exception as e:
+        count_error('predict')
+        print(f"Error in prediction: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': f'Prediction failed: {str(e)}'
+        }), 500
+
+@app.route('/api/predict/batch', methods=['POST'])
+@profiled
+def predict_batch():
+    """
+    Accepts many respondents and predicts them in one pass
+    
+    Expected JSON format:
+    {
+        "records": [
+            {"answers": [...], "test_type": "short", "text": "..."},
+            ...
+        ]
+    }
+    
+    A bare JSON list of records is accepted as well. Invalid records get
+    an error entry in their slot instead of failing the whole batch.
+    Batches over ECHOTYPE_MAX_BATCH_RECORDS (1000) records are rejected.
+    The fields= query parameter works as for /api/predict.
+    """
+    try:
+        fields, error = parse_fields(request.args.get('fields'))
+        if error:
+            return jsonify({'error': error}), 400
         
-        if not answers:
-            return jsonify({'error': 'Answers required'}), 400
+        with timed('parse_json'):
+            data = read_json()
+        records = data.get('records') if isinstance(data, dict) else data
         
-        if not isinstance(answers, list):
-            return jsonify({'error': 'Answers must be a list'}), 400
+        if not isinstance(records, list):
+            return jsonify({'error': 'Records must be a list'}), 400
+        if len(records) > MAX_BATCH_RECORDS:
+            return jsonify({'error': f'At most {MAX_BATCH_RECORDS} records per batch'}), 400
         
-        # Validate answer values
-        if not all(isinstance(a, int) and 1 <= a <= 5 for a in answers):
-            return jsonify({'error': 'All answers must be integers between 1 and 5'}), 400
+        results = [None] * len(records)
+        valid_indices = []
         
-        # Get prediction using the updated function
-        mbti_type, scores = combine_predictions_likert(
-            answers=answers,
-            test_type=test_type,
-            text=text if text and len(text.strip()) >= 50 else None
-        )
+        with timed('validate'):
+            for i, record in enumerate(records):
+                error = validate_prediction_request(record)
+                if error:
+                    results[i] = {'success': False, 'error': error}
+                else:
+                    valid_indices.append(i)
+                    count_request('batch', record.get('test_type', 'short'), has_usable_text(record.get('text')))
         
-        # Return results
+        predictions = combine_predictions_likert_batch([records[i] for i in valid_indices])
+        
+        with timed('serialize'):
+            for i, (mbti_type, scores) in zip(valid_indices, predictions):
+                results[i] = build_prediction_response(mbti_type, scores, fields)
+            
+            return json_response({
+                'success': True,
+                'total': len(records),
+                'failed': len(records) - len(valid_indices),
+                'results': results
+            })
+    
+    except Exception as e:
+        count_error('batch')
+        print(f"Error in batch prediction: {str(e)}")
+        import traceback
+        traceback.print_exc()
         return jsonify({
-            'success': True,
-            'type': mbti_type,
-            'description': TYPE_DESCRIPTIONS.get(mbti_type, 'A unique personality type!'),
-            'scores': {dim: float(score) for dim, score in scores.items()},
-            'dimensions': {
-                'I-E': {
-                    'name': 'Introversion ↔ Extraversion',
-                    'score': float(scores['I-E']),
-                    'trait': 'I' if scores['I-E'] > 0.5 else 'E'
-                },
-                'N-S': {
-                    'name': 'Intuition ↔ Sensing',
-                    'score': float(scores['N-S']),
-                    'trait': 'N' if scores['N-S'] > 0.5 else 'S'
-                },
-                'T-F': {
-                    'name': 'Thinking ↔ Feeling',
-                    'score': float(scores['T-F']),
-                    'trait': 'T' if scores['T-F'] > 0.5 else 'F'
-                },
-                'J-P': {
-                    'name': 'Judging ↔ Perceiving',
-                    'score': float(scores['J-P']),
-                    'trait': 'J' if scores['J-P'] > 0.5 else 'P'
-                }
-            }
-        })
+            'success': False,
+            'error': f'Batch prediction failed: {str(e)}'
+        }), 500
+
+@app.route('/api/text-session', methods=['POST'])
+def start_text_session():
+    """
+    Start a live text analysis session
+    
+    Optional JSON body: {"text": "what the user typed so far"}
+    
+    Returns the session id, plus the first estimate when text was sent.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        text = data.get('text') if isinstance(data, dict) else None
+        error = validate_session_text(text) if text is not None else None
+        if error:
+            return jsonify({'error': error}), 400
+        
+        session_id = create_session()
+        if not text:
+            return jsonify({'success': True, 'session_id': session_id})
+        
+        return json_response(build_text_session_response(session_id, *append_text(session_id, text)))
     
     except Exception as e:
-        print(f"Error in prediction: {str(e)}")
+        count_error('text_session')
+        print(f"Error in text session: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': f'Text analysis failed: {str(e)}'
+        }), 500
+
+@app.route('/api/text-session/<session_id>', methods=['POST', 'DELETE'])
+def update_text_session(session_id):
+    """
+    Append newly typed text to a session and return the updated estimate
+    
+    Expected JSON format:
+    {
+        "text": "only the characters typed since the last update"
+    }
+    
+    Only the new text is cleaned and counted, so each update costs the
+    same however long the text has grown. Edits other than appending need
+    a new session. DELETE ends the session.
+    """
+    if request.method == 'DELETE':
+        if not end_session(session_id):
+            return jsonify({'error': 'Session not found or expired'}), 404
+        return jsonify({'success': True})
+    
+    try:
+        data = request.get_json(silent=True)
+        text = data.get('text') if isinstance(data, dict) else None
+        error = validate_session_text(text)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        updated = append_text(session_id, text)
+        if updated is None:
+            return jsonify({'error': 'Session not found or expired'}), 404
+        
+        return json_response(build_text_session_response(session_id, *updated))
+    
+    except Exception as e:
+        count_error('text_session')
+        print(f"Error in text session: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': f'Text analysis failed: {str(e)}'
+        }), 500
+
+@app.route('/api/quiz-session', methods=['POST'])
+def start_quiz_session():
+    """
+    Start a server-side quiz session
+    
+    Expected JSON format:
+    {
+        "test_type": "short" or "full"
+    }
+    
+    Answers are then posted one at a time to /api/quiz-session/<id>/answer.
+    """
+    data = request.get_json(silent=True) or {}
+    test_type = data.get('test_type', 'short') if isinstance(data, dict) else None
+    if test_type not in get_question_bank().test_types():
+        return jsonify({'error': 'Invalid test type. Use "short" or "full"'}), 400
+    
+    session_id = create_quiz_session(test_type)
+    return json_response({
+        'success': True,
+        'session_id': session_id,
+        'test_type': test_type,
+        'total_questions': get_question_bank().get(test_type).num_questions
+    })
+
+@app.route('/api/quiz-session/<session_id>', methods=['GET', 'DELETE'])
+def quiz_session(session_id):
+    """
+    Progress and provisional type of a quiz session, plus its answers so
+    far (null where unanswered) for resuming it. DELETE ends the session.
+    """
+    if request.method == 'DELETE':
+        if not end_quiz_session(session_id):
+            return jsonify({'error': 'Session not found or expired'}), 404
+        return jsonify({'success': True})
+    
+    try:
+        session = get_quiz_session(session_id)
+    except QuestionsChangedError as e:
+        return jsonify({'error': str(e)}), 409
+    if session is None:
+        return jsonify({'error': 'Session not found or expired'}), 404
+    
+    response = build_quiz_session_response(session_id, session.progress())
+    response['answers'] = [answer or None for answer in session.answers]
+    return json_response(response)
+
+@app.route('/api/quiz-session/<session_id>/answer', methods=['POST'])
+def answer_quiz_session(session_id):
+    """
+    Record one answer and return the updated provisional type
+    
+    Expected JSON format:
+    {
+        "index": 0,   // Position of the question in /api/questions order
+        "answer": 4   // 1-5 response; posting an index again changes it
+    }
+    
+    Only that question's dimension is updated, so each answer costs the
+    same however long the test is.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'No data provided'}), 400
+    
+    try:
+        progress = answer_question(session_id, data.get('index'), data.get('answer'))
+    except QuestionsChangedError as e:
+        return jsonify({'error': str(e)}), 409
+    except QuizSessionError as e:
+        return jsonify({'error': str(e)}), 400
+    if progress is None:
+        return jsonify({'error': 'Session not found or expired'}), 404
+    
+    return json_response(build_quiz_session_response(session_id, progress))
+
+@app.route('/api/quiz-session/<session_id>/result', methods=['POST'])
+@profiled
+def quiz_session_result(session_id):
+    """
+    Final prediction for a completed quiz session
+    
+    Optional JSON body: {"text": "Optional user text..."}
+    
+    The quiz scores come straight from the session's running sums; the
+    response and the fields= query parameter are the same as /api/predict.
+    """
+    try:
+        fields, error = parse_fields(request.args.get('fields'))
+        if error:
+            return jsonify({'error': error}), 400
+        
+        data = request.get_json(silent=True) or {}
+        text = data.get('text') if isinstance(data, dict) else None
+        if text is not None and not isinstance(text, str):
+            return jsonify({'error': 'Text must be a string'}), 400
+        
+        try:
+            session = get_quiz_session(session_id)
+        except QuestionsChangedError as e:
+            return jsonify({'error': str(e)}), 409
+        if session is None:
+            return jsonify({'error': 'Session not found or expired'}), 404
+        if not session.complete:
+            return jsonify({
+                'error': f'{session.num_answered} of {len(session.answers)} questions answered'
+            }), 400
+        
+        count_request('quiz_session', session.test_type, has_usable_text(text))
+        mbti_type, scores = combine_quiz_scores(
+            session.scores(),
+            text=text if has_usable_text(text) else None
+        )
+        
+        with timed('serialize'):
+            return json_response(build_prediction_response(mbti_type, scores, fields))
+    
+    except Exception as e:
+        count_error('quiz_session')
+        print(f"Error in quiz session result: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({
@@ -144,9 +629,52 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'service': 'EchoType API',
-        'version': '1.0'
+        'version': '1.0',
+        'model': get_model_state(),
+        'batcher': get_batcher_stats(),
+        'cache': {
+            'text': text_cache.stats(),
+            'quiz': quiz_cache.stats()
+        },
+        'text_sessions': {'backend': text_sessions.name, 'active': len(text_sessions)},
+        'quiz_sessions': {'backend': quiz_sessions.name, 'active': len(quiz_sessions)}
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of stage latencies, counters and cache stats"""
+    return app.response_class(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/admin/profile', methods=['GET', 'DELETE'])
+def profile_dump():
+    """
+    Collapsed stacks aggregated from profiled requests
+    
+    One 'frame;frame;frame count' line per stack, ready for flamegraph.pl
+    or speedscope. DELETE (or ?reset=1 after reading) starts a new window.
+    Requires the ECHOTYPE_ADMIN_TOKEN in the X-EchoType-Admin-Token header.
+    """
+    if not is_admin(request.headers.get(ADMIN_HEADER)):
+        return jsonify({'error': 'Not found'}), 404
+    
+    if request.method == 'DELETE':
+        profiler.reset()
+        return jsonify({'success': True})
+    
+    body = profiler.collapsed()
+    stats = profiler.stats()
+    if request.args.get('reset') == '1':
+        profiler.reset()
+    
+    response = app.response_class(body, mimetype='text/plain')
+    response.headers['X-Profile-Requests'] = str(stats['requests'])
+    response.headers['X-Profile-Samples'] = str(stats['samples'])
+    return response
+
+# Render the question responses up front so the first page load is cheap too
+for _test_type in ('short', 'full'):
+    get_rendered_questions(_test_type)
+
 if __name__ == '__main__':
     print("=" * 60)
     print("  ECHOTYPE SERVER STARTING")
@@ -155,7 +683,12 @@ if __name__ == '__main__':
     print("📊 API endpoints available:")
     print("   - GET  /api/questions/<test_type>")
     print("   - POST /api/predict")
+    print("   - POST /api/predict/batch")
+    print("   - POST /api/text-session[/<id>]")
+    print("   - POST /api/quiz-session[/<id>/answer|/<id>/result]")
     print("   - GET  /api/health")
+    print("   - GET  /api/metrics")
+    print("   - GET  /api/admin/profile (needs ECHOTYPE_ADMIN_TOKEN)")
     print("\n💡 Open http://localhost:5000 in your browser")
     print("=" * 60 + "\n")
     
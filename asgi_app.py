@@ -0,0 +1,503 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import FileResponse, JSONResponse, Response
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+from app import (
+    MAX_BATCH_RECORDS, QUESTIONS_MAX_AGE, build_prediction_response, build_quiz_session_response,
+    build_text_session_response, get_rendered_questions, parse_explain, parse_fields, validate_session_text
+)
+from combiner import (
+    combine_predictions_explained, combine_predictions_likert, combine_predictions_likert_batch,
+    combine_quiz_scores, has_usable_text, validate_prediction_request
+)
+from json_codec import dumps, loads
+from metrics import count_error, count_request, registry, timed
+from predict import get_batcher_stats, get_model_state, text_cache
+from quiz_scorer import get_question_bank, quiz_cache
+from quiz_sessions import (
+    QuestionsChangedError, QuizSessionError, answer_question, create_quiz_session, end_quiz_session,
+    get_quiz_session, quiz_sessions
+)
+from sessions import append_text, create_session, end_session, text_sessions
+
+# Inference pool settings
+INFERENCE_MODE = os.environ.get('ECHOTYPE_INFERENCE_MODE', 'process')
+INFERENCE_WORKERS = int(os.environ.get('ECHOTYPE_INFERENCE_WORKERS', os.cpu_count() or 1))
+INFERENCE_QUEUE = int(os.environ.get('ECHOTYPE_INFERENCE_QUEUE', INFERENCE_WORKERS * 8))
+
+class PoolFull(Exception):
+    """Raised when the inference pool already holds max_pending jobs"""
+
+class InferencePool:
+    """
+    Bounded executor for CPU-bound text inference
+
+    Jobs run in a process (or thread) pool so they never block the event
+    loop. At most `max_pending` jobs may be running or queued; beyond that
+    submit() raises PoolFull instead of letting latency grow without bound.
+    """
+
+    def __init__(self, workers, max_pending, mode='process'):
+        if mode == 'process':
+            # Workers forked from this process could inherit a lock held by one
+            # of its threads (model load, cache, local session jobs) and hang on
+            # it; the forkserver starts them from a clean single-threaded process
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+            else:
+                context = None
+            self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        elif mode == 'thread':
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='inference')
+        else:
+            raise ValueError(f"Unknown inference mode: {mode}")
+
+        self.mode = mode
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+
+    async def submit(self, fn, *args, local=False):
+        """
+        Run fn(*args) in the pool
+
+        local=True runs it in a thread of this process instead, for jobs
+        that need this process's state (in-memory sessions), while still
+        counting against max_pending.
+        """
+        # Only touched from the event loop thread, so no lock is needed
+        if self.pending >= self.max_pending:
+            raise PoolFull()
+
+        self.pending += 1
+        try:
+            if local:
+                return await asyncio.to_thread(fn, *args)
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'workers': self.workers,
+            'pending': self.pending,
+            'max_pending': self.max_pending
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+inference_pool = None
+
+@asynccontextmanager
+async def lifespan(app):
+    global inference_pool
+    inference_pool = InferencePool(INFERENCE_WORKERS, INFERENCE_QUEUE, INFERENCE_MODE)
+    try:
+        yield
+    finally:
+        inference_pool.shutdown()
+
+def busy_response():
+    return JSONResponse(
+        {'success': False, 'error': 'Server busy, please retry'},
+        status_code=503,
+        headers={'Retry-After': '1'}
+    )
+
+async def read_json(request):
+    try:
+        return loads(await request.body())
+    except ValueError:
+        return None
+
+def json_response(payload, status_code=200):
+    return Response(dumps(payload), status_code=status_code, media_type='application/json')
+
+async def home(request):
+    """Serve the main web interface"""
+    return FileResponse(os.path.join('templates', 'index.html'))
+
+async def get_questions(request):
+    """Return the pre-rendered questions for the specified test type"""
+    test_type = request.path_params['test_type']
+    try:
+        if test_type not in ['short', 'full']:
+            return JSONResponse({'error': 'Invalid test type. Use "short" or "full"'}, status_code=400)
+
+        rendered = get_rendered_questions(test_type)
+        encoding = rendered.choose_encoding(request.headers.get('accept-encoding'))
+        headers = rendered.headers(encoding, QUESTIONS_MAX_AGE)
+
+        if rendered.not_modified(request.headers.get('if-none-match'), encoding):
+            headers.pop('Content-Encoding', None)
+            return Response(status_code=304, headers=headers)
+
+        return Response(rendered.bodies[encoding], headers=headers, media_type='application/json')
+
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+async def predict(request):
+    """
+    Same contract as app.predict
+
+    Quiz-only requests are scored inline on the event loop; requests with
+    text are sent to the inference pool.
+    """
+    try:
+        fields, error = parse_fields(request.query_params.get('fields'))
+        if not error:
+            top_k, error = parse_explain(request.query_params)
+        if error:
+            return JSONResponse({'error': error}, status_code=400)
+
+        data = await read_json(request)
+
+        with timed('validate'):
+            error = validate_prediction_request(data)
+        if error:
+            return JSONResponse({'error': error}, status_code=400)
+
+        answers = data.get('answers')
+        test_type = data.get('test_type', 'short')
+        text = data.get('text', '')
+        count_request('predict', test_type, has_usable_text(text))
+
+        explanation = None
+        if has_usable_text(text) and top_k:
+            mbti_type, scores, explanation = await inference_pool.submit(
+                combine_predictions_explained, answers, test_type, text, 0.7, top_k
+            )
+        elif has_usable_text(text):
+            mbti_type, scores = await inference_pool.submit(
+                combine_predictions_likert, answers, test_type, text
+            )
+        else:
+            mbti_type, scores = combine_predictions_likert(answers, test_type, None)
+
+        with timed('serialize'):
+            response = build_prediction_response(mbti_type, scores, fields)
+            if top_k:
+                response['explanation'] = explanation
+            return json_response(response)
+
+    except PoolFull:
+        return busy_response()
+
+    except Exception as e:
+        count_error('predict')
+        print(f"Error in prediction: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return JSONResponse({
+            'success': False,
+            'error': f'Prediction failed: {str(e)}'
+        }, status_code=500)
+
+async def predict_batch(request):
+    """Same contract as app.predict_batch; the whole batch is one pool job"""
+    try:
+        fields, error = parse_fields(request.query_params.get('fields'))
+        if error:
+            return JSONResponse({'error': error}, status_code=400)
+
+        data = await read_json(request)
+        records = data.get('records') if isinstance(data, dict) else data
+
+        if not isinstance(records, list):
+            return JSONResponse({'error': 'Records must be a list'}, status_code=400)
+        if len(records) > MAX_BATCH_RECORDS:
+            return JSONResponse({'error': f'At most {MAX_BATCH_RECORDS} records per batch'}, status_code=400)
+
+        results = [None] * len(records)
+        valid_indices = []
+
+        for i, record in enumerate(records):
+            error = validate_prediction_request(record)
+            if error:
+                results[i] = {'success': False, 'error': error}
+            else:
+                valid_indices.append(i)
+                count_request('batch', record.get('test_type', 'short'), has_usable_text(record.get('text')))
+
+        valid_records = [records[i] for i in valid_indices]
+        if any(has_usable_text(record.get('text')) for record in valid_records):
+            predictions = await inference_pool.submit(combine_predictions_likert_batch, valid_records)
+        else:
+            predictions = combine_predictions_likert_batch(valid_records)
+
+        for i, (mbti_type, scores) in zip(valid_indices, predictions):
+            results[i] = build_prediction_response(mbti_type, scores, fields)
+
+        return json_response({
+            'success': True,
+            'total': len(records),
+            'failed': len(records) - len(valid_indices),
+            'results': results
+        })
+
+    except PoolFull:
+        return busy_response()
+
+    except Exception as e:
+        count_error('batch')
+        print(f"Error in batch prediction: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return JSONResponse({
+            'success': False,
+            'error': f'Batch prediction failed: {str(e)}'
+        }, status_code=500)
+
+async def append_session_text(session_id, text):
+    """
+    Run append_text through the inference pool
+
+    In-memory sessions live in this process, so their updates run in a
+    local thread; SQLite sessions can go to any pool worker. Either way
+    they count against the pool's limit and get a 503 when it is full.
+    """
+    return await inference_pool.submit(append_text, session_id, text, local=text_sessions.name == 'memory')
+
+async def start_text_session(request):
+    """Same contract as app.start_text_session"""
+    try:
+        data = await read_json(request) or {}
+        text = data.get('text') if isinstance(data, dict) else None
+        error = validate_session_text(text) if text is not None else None
+        if error:
+            return JSONResponse({'error': error}, status_code=400)
+
+        session_id = await session_call(text_sessions, create_session)
+        if not text:
+            return JSONResponse({'success': True, 'session_id': session_id})
+
+        updated = await append_session_text(session_id, text)
+        return json_response(build_text_session_response(session_id, *updated))
+
+    except PoolFull:
+        return busy_response()
+
+    except Exception as e:
+        count_error('text_session')
+        print(f"Error in text session: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return JSONResponse({
+            'success': False,
+            'error': f'Text analysis failed: {str(e)}'
+        }, status_code=500)
+
+async def update_text_session(request):
+    """Same contract as app.update_text_session"""
+    session_id = request.path_params['session_id']
+    if request.method == 'DELETE':
+        if not await session_call(text_sessions, end_session, session_id):
+            return JSONResponse({'error': 'Session not found or expired'}, status_code=404)
+        return JSONResponse({'success': True})
+
+    try:
+        data = await read_json(request)
+        text = data.get('text') if isinstance(data, dict) else None
+        error = validate_session_text(text)
+        if error:
+            return JSONResponse({'error': error}, status_code=400)
+
+        updated = await append_session_text(session_id, text)
+        if updated is None:
+            return JSONResponse({'error': 'Session not found or expired'}, status_code=404)
+
+        return json_response(build_text_session_response(session_id, *updated))
+
+    except PoolFull:
+        return busy_response()
+
+    except Exception as e:
+        count_error('text_session')
+        print(f"Error in text session: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return JSONResponse({
+            'success': False,
+            'error': f'Text analysis failed: {str(e)}'
+        }, status_code=500)
+
+async def session_call(store, fn, *args):
+    """
+    Run a cheap session store operation
+
+    In-memory stores do O(1) dict updates and run inline; SQLite stores do
+    blocking file I/O and run in a thread.
+    """
+    if store.name == 'memory':
+        return fn(*args)
+    return await asyncio.to_thread(fn, *args)
+
+async def start_quiz_session(request):
+    """Same contract as app.start_quiz_session"""
+    data = await read_json(request) or {}
+    test_type = data.get('test_type', 'short') if isinstance(data, dict) else None
+    if test_type not in get_question_bank().test_types():
+        return JSONResponse({'error': 'Invalid test type. Use "short" or "full"'}, status_code=400)
+
+    session_id = await session_call(quiz_sessions, create_quiz_session, test_type)
+    return json_response({
+        'success': True,
+        'session_id': session_id,
+        'test_type': test_type,
+        'total_questions': get_question_bank().get(test_type).num_questions
+    })
+
+async def quiz_session(request):
+    """Same contract as app.quiz_session"""
+    session_id = request.path_params['session_id']
+    if request.method == 'DELETE':
+        if not await session_call(quiz_sessions, end_quiz_session, session_id):
+            return JSONResponse({'error': 'Session not found or expired'}, status_code=404)
+        return JSONResponse({'success': True})
+
+    try:
+        session = await session_call(quiz_sessions, get_quiz_session, session_id)
+    except QuestionsChangedError as e:
+        return JSONResponse({'error': str(e)}, status_code=409)
+    if session is None:
+        return JSONResponse({'error': 'Session not found or expired'}, status_code=404)
+
+    response = build_quiz_session_response(session_id, session.progress())
+    response['answers'] = [answer or None for answer in session.answers]
+    return json_response(response)
+
+async def answer_quiz_session(request):
+    """Same contract as app.answer_quiz_session"""
+    session_id = request.path_params['session_id']
+    data = await read_json(request)
+    if not isinstance(data, dict):
+        return JSONResponse({'error': 'No data provided'}, status_code=400)
+
+    try:
+        progress = await session_call(
+            quiz_sessions, answer_question, session_id, data.get('index'), data.get('answer')
+        )
+    except QuestionsChangedError as e:
+        return JSONResponse({'error': str(e)}, status_code=409)
+    except QuizSessionError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    if progress is None:
+        return JSONResponse({'error': 'Session not found or expired'}, status_code=404)
+
+    return json_response(build_quiz_session_response(session_id, progress))
+
+async def quiz_session_result(request):
+    """Same contract as app.quiz_session_result; text goes to the inference pool"""
+    session_id = request.path_params['session_id']
+    try:
+        fields, error = parse_fields(request.query_params.get('fields'))
+        if error:
+            return JSONResponse({'error': error}, status_code=400)
+
+        data = await read_json(request) or {}
+        text = data.get('text') if isinstance(data, dict) else None
+        if text is not None and not isinstance(text, str):
+            return JSONResponse({'error': 'Text must be a string'}, status_code=400)
+
+        try:
+            session = await session_call(quiz_sessions, get_quiz_session, session_id)
+        except QuestionsChangedError as e:
+            return JSONResponse({'error': str(e)}, status_code=409)
+        if session is None:
+            return JSONResponse({'error': 'Session not found or expired'}, status_code=404)
+        if not session.complete:
+            return JSONResponse({
+                'error': f'{session.num_answered} of {len(session.answers)} questions answered'
+            }, status_code=400)
+
+        count_request('quiz_session', session.test_type, has_usable_text(text))
+        if has_usable_text(text):
+            mbti_type, scores = await inference_pool.submit(combine_quiz_scores, session.scores(), text)
+        else:
+            mbti_type, scores = combine_quiz_scores(session.scores())
+
+        with timed('serialize'):
+            return json_response(build_prediction_response(mbti_type, scores, fields))
+
+    except PoolFull:
+        return busy_response()
+
+    except Exception as e:
+        count_error('quiz_session')
+        print(f"Error in quiz session result: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return JSONResponse({
+            'success': False,
+            'error': f'Prediction failed: {str(e)}'
+        }, status_code=500)
+
+async def health_check(request):
+    """Simple health check endpoint"""
+    return JSONResponse({
+        'status': 'healthy',
+        'service': 'EchoType API',
+        'version': '1.0',
+        'model': get_model_state(),
+        'batcher': get_batcher_stats(),
+        'inference_pool': inference_pool.stats() if inference_pool else None,
+        'cache': {
+            'text': text_cache.stats(),
+            'quiz': quiz_cache.stats()
+        },
+        'text_sessions': {'backend': text_sessions.name, 'active': len(text_sessions)},
+        'quiz_sessions': {'backend': quiz_sessions.name, 'active': len(quiz_sessions)}
+    })
+
+async def metrics(request):
+    """
+    Same exposition as app.metrics
+
+    With the process pool, text-stage timings are recorded in the workers
+    and do not show up here; use thread mode to see them.
+    """
+    return Response(registry.render(), media_type='text/plain; version=0.0.4')
+
+app = Starlette(
+    routes=[
+        Route('/', home),
+        Route('/api/questions/{test_type}', get_questions, methods=['GET']),
+        Route('/api/predict', predict, methods=['POST']),
+        Route('/api/predict/batch', predict_batch, methods=['POST']),
+        Route('/api/text-session', start_text_session, methods=['POST']),
+        Route('/api/text-session/{session_id}', update_text_session, methods=['POST', 'DELETE']),
+        Route('/api/quiz-session', start_quiz_session, methods=['POST']),
+        Route('/api/quiz-session/{session_id}', quiz_session, methods=['GET', 'DELETE']),
+        Route('/api/quiz-session/{session_id}/answer', answer_quiz_session, methods=['POST']),
+        Route('/api/quiz-session/{session_id}/result', quiz_session_result, methods=['POST']),
+        Route('/api/health', health_check, methods=['GET']),
+        Route('/api/metrics', metrics, methods=['GET']),
+        Mount('/static', StaticFiles(directory='static'), name='static')
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan
+)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("=" * 60)
+    print("  ECHOTYPE ASGI SERVER STARTING")
+    print("=" * 60)
+    print("\n🚀 Server running at: http://localhost:5000")
+    print(f"🧵 Text inference: {INFERENCE_WORKERS} {INFERENCE_MODE} workers, queue of {INFERENCE_QUEUE}")
+    print("=" * 60 + "\n")
+
+    uvicorn.run(app, host='127.0.0.1', port=5000)
@@ -0,0 +1,100 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import Histogram
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+BATCH_WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+class MicroBatcher:
+    """
+    Collects concurrent single-item calls into one batched call
+
+    Callers submit() an item and get a Future. A background thread takes
+    the first pending item, keeps collecting until `max_batch` items are
+    waiting or `max_wait` seconds have passed since that first item was
+    queued, then calls `batch_fn` once for the whole batch and resolves
+    every caller's future.
+
+    Args:
+        batch_fn: Function mapping a list of items to a list of results
+        max_batch: Maximum items per batch
+        max_wait: Seconds the first item of a batch may wait for company
+    """
+
+    def __init__(self, batch_fn, max_batch=64, max_wait=0.005, name='micro-batcher'):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.batch_waits = Histogram(BATCH_WAIT_BUCKETS)
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """Queue one item and return a Future for its result"""
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item):
+        """Submit one item and block until its result is ready"""
+        return self.submit(item).result()
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            live = [(item, future) for item, future, _ in batch if future.set_running_or_notify_cancel()]
+
+            self.batch_sizes.observe(len(batch))
+            self.batch_waits.observe(time.perf_counter() - batch[0][2])
+            self.batches += 1
+            self.items += len(batch)
+
+            if not live:
+                continue
+
+            try:
+                results = self.batch_fn([item for item, _ in live])
+            except Exception as e:
+                for _, future in live:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(live, results):
+                future.set_result(result)
+
+    def stats(self):
+        """Queue depth, batch size histogram and added wait time"""
+        return {
+            'max_batch': self.max_batch,
+            'max_wait': self.max_wait,
+            'queue_depth': self.queue_depth(),
+            'batches': self.batches,
+            'items': self.items,
+            'batch_size': self.batch_sizes.snapshot(),
+            'batch_wait_seconds': self.batch_waits.snapshot()
+        }
@@ -0,0 +1,301 @@
+import argparse
+import contextlib
+import json
+import os
+import pickle
+import platform
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+DIMENSIONS = ['I-E', 'N-S', 'T-F', 'J-P']
+
+# Allowed slowdown before a scenario counts as a regression in --compare mode
+DEFAULT_THRESHOLD = 0.10
+
+def make_vocabulary(size, rng):
+    """Pseudo-words of 3-10 letters, standing in for the Kaggle vocabulary"""
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10))))
+    return sorted(words)
+
+def make_post_row(vocabulary, rng, posts=50, words_per_post=25):
+    """
+    One synthetic dataset row: ~50 posts joined by '|||' like mbti_1.csv
+
+    Words follow a Zipf-like distribution and some posts carry URLs and
+    punctuation, so cleaning does realistic work.
+    """
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    parts = []
+    for _ in range(posts):
+        words = rng.choices(vocabulary, weights=weights, k=words_per_post)
+        if rng.random() < 0.2:
+            words.append('https://www.youtube.com/watch?v=' + ''.join(rng.choices(string.ascii_letters, k=11)))
+        parts.append("'" + ' '.join(words).capitalize() + "!! :)")
+    return '|||'.join(parts)
+
+def build_synthetic_model(directory, n_docs=400, seed=0):
+    """
+    Train a small but realistically shaped text model from synthetic posts
+
+    Writes tfidf_vectorizer.pkl, mbti_models.pkl and model_artifact/ into
+    directory, so the suite runs without the Kaggle CSV.
+
+    Returns:
+        Tuple of (artifact directory, list of synthetic post rows)
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    from inference import LinearTextModel
+    from tokenizer import clean_text
+
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(5000, rng)
+    rows = [make_post_row(vocabulary, rng) for _ in range(n_docs)]
+
+    vectorizer = TfidfVectorizer(max_features=3000, min_df=5, max_df=0.7)
+    X = vectorizer.fit_transform([clean_text(row) for row in rows])
+
+    labels = np.random.default_rng(seed).integers(0, 2, size=(n_docs, len(DIMENSIONS)))
+    models = {
+        dim: LogisticRegression(max_iter=200).fit(X, labels[:, i])
+        for i, dim in enumerate(DIMENSIONS)
+    }
+
+    with open(os.path.join(directory, 'tfidf_vectorizer.pkl'), 'wb') as f:
+        pickle.dump(vectorizer, f)
+    with open(os.path.join(directory, 'mbti_models.pkl'), 'wb') as f:
+        pickle.dump(models, f)
+
+    artifact_dir = os.path.join(directory, 'model_artifact')
+    LinearTextModel.from_models(vectorizer, models).save_artifact(artifact_dir)
+    return artifact_dir, rows
+
+def time_calls(fn, repeat):
+    """Wall time in seconds of `repeat` individual calls"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def latency_result(timings, **details):
+    """Summarize per-call timings; lower is better"""
+    timings = sorted(timings)
+    return {
+        'unit': 'ms',
+        'value': statistics.median(timings) * 1000,
+        'p95': timings[int(len(timings) * 0.95) - 1] * 1000,
+        'higher_is_better': False,
+        **details
+    }
+
+def throughput_result(timings, items_per_call, unit='ops/s', **details):
+    """Summarize timings as items per second (median call); higher is better"""
+    return {
+        'unit': unit,
+        'value': items_per_call / statistics.median(timings),
+        'higher_is_better': True,
+        **details
+    }
+
+def bench_quiz(results, repeat):
+    import quiz_scorer
+
+    # Measure the scoring itself, not cache hits
+    quiz_scorer.quiz_cache.maxsize = 0
+    rng = random.Random(1)
+
+    for test_type, num_questions in [('short', 20), ('full', 60)]:
+        sheets = [[rng.randint(1, 5) for _ in range(num_questions)] for _ in range(1000)]
+
+        def score_all():
+            for answers in sheets:
+                quiz_scorer.score_quiz(answers, test_type)
+
+        results[f'score_quiz_{test_type}'] = throughput_result(time_calls(score_all, repeat), len(sheets))
+
+        matrix = np.array(sheets * 100, dtype=np.uint8)
+        results[f'score_quiz_batch_{test_type}'] = throughput_result(
+            time_calls(lambda: quiz_scorer.score_quiz_batch(matrix, test_type), repeat), len(matrix)
+        )
+
+def bench_clean_text(results, rows, repeat):
+    from tokenizer import clean_text
+
+    total_chars = sum(len(row) for row in rows)
+
+    def clean_all():
+        for row in rows:
+            clean_text(row)
+
+    timings = time_calls(clean_all, repeat)
+    results['clean_text'] = throughput_result(timings, len(rows), unit='posts/s',
+                                              avg_chars=total_chars // len(rows))
+    results['clean_text_chars'] = throughput_result(timings, total_chars, unit='chars/s')
+
+def bench_predict(results, rows, repeat):
+    import predict
+
+    # Every call must reach the model
+    predict.text_cache.maxsize = 0
+    predict.get_text_model()
+
+    single = rows[0]
+    results['predict_mbti_single'] = latency_result(
+        time_calls(lambda: predict.predict_mbti(single), repeat * 20)
+    )
+
+    # Same text with the top-k word explanation, to track its overhead
+    results['predict_mbti_explain'] = latency_result(
+        time_calls(lambda: predict.predict_mbti(single, explain=True), repeat * 20)
+    )
+
+    batch = rows[:64]
+    timings = time_calls(lambda: predict.predict_mbti_batch(batch), repeat)
+    results['predict_mbti_batch_64'] = latency_result(timings, batch_size=len(batch))
+    results['predict_mbti_batch_64_throughput'] = throughput_result(timings, len(batch), unit='texts/s')
+
+def bench_cold_start(results, directory, artifact_dir, repeat):
+    from inference import LinearTextModel
+
+    def load_pickles():
+        with open(os.path.join(directory, 'tfidf_vectorizer.pkl'), 'rb') as f:
+            vectorizer = pickle.load(f)
+        with open(os.path.join(directory, 'mbti_models.pkl'), 'rb') as f:
+            models = pickle.load(f)
+        LinearTextModel.from_models(vectorizer, models)
+
+    results['cold_start_pickle'] = latency_result(time_calls(load_pickles, repeat))
+    results['cold_start_artifact'] = latency_result(
+        time_calls(lambda: LinearTextModel.from_artifact(artifact_dir), repeat)
+    )
+
+def bench_http(results, rows, repeat):
+    from app import app
+
+    client = app.test_client()
+    quiz_only = {'answers': [3] * 20, 'test_type': 'short'}
+    with_text = {'answers': [4] * 60, 'test_type': 'full', 'text': rows[1]}
+
+    def post(payload):
+        response = client.post('/api/predict', json=payload)
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    results['http_predict_quiz_only'] = latency_result(time_calls(lambda: post(quiz_only), repeat * 20))
+    results['http_predict_with_text'] = latency_result(time_calls(lambda: post(with_text), repeat * 5))
+
+def run_suite(repeat=5, scenarios=None):
+    """
+    Run the benchmark scenarios against synthetic fixtures
+
+    Args:
+        repeat: Timed repetitions per scenario (more for cheap scenarios)
+        scenarios: Optional list of scenario groups to run
+
+    Returns:
+        Report dictionary ready to be dumped as JSON
+    """
+    import predict
+
+    scenarios = scenarios or ['quiz', 'clean', 'predict', 'cold_start', 'http']
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        print("🔧 Building synthetic fixtures...", file=sys.stderr)
+        artifact_dir, rows = build_synthetic_model(directory)
+
+        # Serve the synthetic model instead of whatever is in the working directory
+        predict.ARTIFACT_DIR = artifact_dir
+        predict._text_model = None
+
+        for name in scenarios:
+            print(f"⏱  {name}", file=sys.stderr)
+            if name == 'quiz':
+                bench_quiz(results, repeat)
+            elif name == 'clean':
+                bench_clean_text(results, rows[:100], repeat)
+            elif name == 'predict':
+                bench_predict(results, rows, repeat)
+            elif name == 'cold_start':
+                bench_cold_start(results, directory, artifact_dir, repeat)
+            elif name == 'http':
+                bench_http(results, rows, repeat)
+            else:
+                raise ValueError(f"Unknown scenario: {name}")
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat
+        },
+        'results': results
+    }
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare a report with a saved baseline
+
+    Returns:
+        List of (scenario, baseline value, current value, relative change, regressed)
+    """
+    rows = []
+    for name, current in report['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None or not previous['value']:
+            continue
+
+        change = (current['value'] - previous['value']) / previous['value']
+        # Positive change is good for throughput, bad for latency
+        slowdown = -change if current['higher_is_better'] else change
+        rows.append((name, previous['value'], current['value'], change, slowdown > threshold))
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='EchoType benchmark suite (synthetic fixtures)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions per scenario')
+    parser.add_argument('--scenario', action='append', dest='scenarios',
+                        choices=['quiz', 'clean', 'predict', 'cold_start', 'http'],
+                        help='Run only this scenario group (repeatable)')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--compare', metavar='BASELINE', help='Flag regressions against a saved report')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Relative slowdown that counts as a regression (default 0.10)')
+    args = parser.parse_args()
+
+    # Keep stdout clean for the JSON report (model loading prints progress)
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run_suite(args.repeat, args.scenarios)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Saved: {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+        regressions = 0
+        print(f"\n--- Compared with {args.compare} (threshold {args.threshold:.0%}) ---", file=sys.stderr)
+        for name, before, after, change, regressed in compare(report, baseline, args.threshold):
+            regressions += regressed
+            flag = '❌ REGRESSION' if regressed else '✓'
+            print(f"  {name:<36} {before:>14.3f} → {after:>14.3f} ({change:+.1%}) {flag}", file=sys.stderr)
+
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,271 @@
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from combiner import combine_predictions_likert_batch, validate_prediction_request
+from quiz_scorer import DIMENSIONS
+
+OUTPUT_FIELDS = ['id', 'type'] + DIMENSIONS + ['error']
+
+def detect_format(path, fmt=None):
+    """Pick 'csv' or 'jsonl' from an explicit format or the file extension"""
+    if fmt:
+        return fmt
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+def parse_answers(value):
+    """Accept a JSON list or a string of numbers separated by anything"""
+    if isinstance(value, list):
+        return value
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f'expected a list or a string, got {type(value).__name__}')
+    value = (value or '').strip()
+    if value.startswith('['):
+        return json.loads(value)
+    return [int(number) for number in re.findall(r'-?\d+', value)]
+
+def iter_records(path, fmt, start_offset=0):
+    """
+    Stream records from a CSV or JSONL file
+
+    The file is read in binary mode so every record comes with the byte
+    offset just past it, which is what --resume restarts from. CSV records
+    may span several lines when a quoted field contains newlines.
+
+    Yields:
+        (end_offset, record) tuples; record is a dict or a parse error string
+    """
+    with open(path, 'rb') as f:
+        header = None
+        if fmt == 'csv':
+            header = next(csv.reader([f.readline().decode('utf-8-sig')]))
+        if start_offset > f.tell():
+            f.seek(start_offset)
+
+        buffer = b''
+        while True:
+            line = f.readline()
+            if not line:
+                break
+
+            buffer += line
+            # An odd number of quotes means a quoted field continues on the next line
+            if fmt == 'csv' and buffer.count(b'"') % 2:
+                continue
+
+            raw, buffer = buffer, b''
+            if not raw.strip():
+                continue
+
+            try:
+                if fmt == 'csv':
+                    row = next(csv.reader(io.StringIO(raw.decode('utf-8'))))
+                    record = dict(zip(header, row))
+                else:
+                    record = json.loads(raw)
+                    if not isinstance(record, dict):
+                        raise ValueError(f'expected a JSON object, got {type(record).__name__}')
+                yield f.tell(), record
+            except (ValueError, StopIteration) as e:
+                yield f.tell(), f'Unreadable record: {e}'
+
+def normalize_record(record):
+    """Turn a raw CSV/JSONL record into a combiner payload"""
+    return {
+        'answers': parse_answers(record.get('answers')),
+        'test_type': record.get('test_type') or 'short',
+        'text': record.get('text') or None
+    }
+
+def score_chunk(records, first_index, quiz_weight=0.7):
+    """
+    Score one chunk of records
+
+    Runs in a worker process when --workers > 1. Invalid records get an
+    error row instead of failing the chunk.
+
+    Args:
+        records: List of raw records (dicts) or parse error strings
+        first_index: Record number of the first record, used as fallback id
+        quiz_weight: How much to trust quiz vs text
+
+    Returns:
+        List of output rows in input order
+    """
+    rows = []
+    payloads = []
+    valid = []
+
+    for offset, record in enumerate(records):
+        row = {field: None for field in OUTPUT_FIELDS}
+        rows.append(row)
+
+        if isinstance(record, str):
+            row['error'] = record
+            continue
+        if not isinstance(record, dict):
+            row['error'] = f'Unreadable record: expected an object, got {type(record).__name__}'
+            continue
+
+        row['id'] = record.get('id', first_index + offset)
+        try:
+            payload = normalize_record(record)
+        except (ValueError, TypeError) as e:
+            row['error'] = f'Invalid answers: {e}'
+            continue
+
+        error = validate_prediction_request(payload)
+        if error:
+            row['error'] = error
+            continue
+
+        payloads.append(payload)
+        valid.append(row)
+
+    for row, (mbti_type, scores) in zip(valid, combine_predictions_likert_batch(payloads, quiz_weight)):
+        row['type'] = mbti_type
+        for dim in DIMENSIONS:
+            row[dim] = round(float(scores[dim]), 6)
+
+    return rows
+
+def iter_chunks(records, chunk_size):
+    """Group (offset, record) pairs into (end_offset, records) chunks"""
+    chunk = []
+    end_offset = None
+    for end_offset, record in records:
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield end_offset, chunk
+            chunk = []
+    if chunk:
+        yield end_offset, chunk
+
+class ResultWriter:
+    """Appends scored rows to a CSV or JSONL file and records a checkpoint"""
+
+    def __init__(self, path, fmt, append):
+        self.path = path
+        self.fmt = fmt
+        needs_header = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'a' if append else 'w', newline='')
+        self.csv_writer = None
+        if fmt == 'csv':
+            self.csv_writer = csv.DictWriter(self.file, fieldnames=OUTPUT_FIELDS)
+            if needs_header:
+                self.csv_writer.writeheader()
+
+    def write(self, rows, end_offset, records_done):
+        if self.csv_writer:
+            self.csv_writer.writerows(rows)
+        else:
+            for row in rows:
+                self.file.write(json.dumps(row) + '\n')
+        self.file.flush()
+
+        # Written after the rows so a crash never skips unwritten input
+        with open(checkpoint_path(self.path), 'w') as f:
+            json.dump({'offset': end_offset, 'records': records_done}, f)
+
+    def close(self):
+        self.file.close()
+
+def checkpoint_path(output_path):
+    return output_path + '.checkpoint'
+
+def run(input_path, output_path, input_format=None, output_format=None,
+        chunk_size=1000, workers=1, start_offset=0, resume=False, quiz_weight=0.7):
+    """
+    Stream input records through the scorer and write results incrementally
+
+    Memory stays bounded by chunk_size * (2 * workers) records in flight.
+
+    Returns:
+        Tuple of (records processed in this run, records failed)
+    """
+    input_format = detect_format(input_path, input_format)
+    output_format = detect_format(output_path, output_format)
+
+    records_done = 0
+    append = start_offset > 0
+    if resume and os.path.exists(checkpoint_path(output_path)):
+        with open(checkpoint_path(output_path), 'r') as f:
+            checkpoint = json.load(f)
+        start_offset = checkpoint['offset']
+        records_done = checkpoint['records']
+        append = True
+        print(f"↩️  Resuming at byte {start_offset} after {records_done} records", file=sys.stderr)
+
+    writer = ResultWriter(output_path, output_format, append=append)
+    chunks = iter_chunks(iter_records(input_path, input_format, start_offset), chunk_size)
+    processed = 0
+    failed = 0
+    started = time.perf_counter()
+
+    def handle(rows, end_offset):
+        nonlocal records_done, processed, failed
+        records_done += len(rows)
+        processed += len(rows)
+        failed += sum(1 for row in rows if row['error'])
+        writer.write(rows, end_offset, records_done)
+        rate = processed / max(time.perf_counter() - started, 1e-9)
+        print(f"  {records_done} records ({rate:,.0f}/s)", file=sys.stderr)
+
+    try:
+        if workers <= 1:
+            for end_offset, chunk in chunks:
+                handle(score_chunk(chunk, records_done, quiz_weight), end_offset)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = []
+                next_index = records_done
+                for end_offset, chunk in chunks:
+                    pending.append((executor.submit(score_chunk, chunk, next_index, quiz_weight), end_offset))
+                    next_index += len(chunk)
+
+                    # Keep results in input order and a bounded number of chunks in flight
+                    while len(pending) >= workers * 2:
+                        future, offset = pending.pop(0)
+                        handle(future.result(), offset)
+
+                for future, offset in pending:
+                    handle(future.result(), offset)
+    finally:
+        writer.close()
+
+    return processed, failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Score archived quiz exports (CSV or JSONL with answers, test_type and optional text)'
+    )
+    parser.add_argument('input', help='Input .csv or .jsonl file')
+    parser.add_argument('output', help='Output .csv or .jsonl file')
+    parser.add_argument('--input-format', choices=['csv', 'jsonl'], help='Override input format detection')
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'], help='Override output format detection')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Records per scoring chunk')
+    parser.add_argument('--workers', type=int, default=1, help='Process-parallel chunks')
+    parser.add_argument('--quiz-weight', type=float, default=0.7, help='Weight of quiz vs text')
+    parser.add_argument('--start-offset', type=int, default=0, help='Byte offset in the input to start from')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue from the checkpoint written next to the output file')
+    args = parser.parse_args()
+
+    print("📦 EchoType bulk scoring", file=sys.stderr)
+    total, failed = run(
+        args.input, args.output,
+        input_format=args.input_format,
+        output_format=args.output_format,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        start_offset=args.start_offset,
+        resume=args.resume,
+        quiz_weight=args.quiz_weight
+    )
+    print(f"✓ Scored {total} records ({failed} failed) → {args.output}", file=sys.stderr)
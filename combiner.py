@@ -1,59 +1,205 @@
-from quiz_scorer import score_quiz
-from predict import predict_mbti
+import numpy as np
 
-def combine_predictions_likert(answers, test_type='short', text=None, quiz_weight=0.7):
+from quiz_scorer import DIMENSIONS, get_question_bank, score_quiz, score_quiz_batch
+from predict import EXPLAIN_TOP_K, predict_mbti, predict_mbti_batch
+from metrics import timed
+
+# Minimum length of user text before it is analyzed
+MIN_TEXT_LENGTH = 50
+
+VALID_ANSWERS = frozenset({1, 2, 3, 4, 5})
+# bool is an int subclass and has always been accepted
+ANSWER_TYPES = frozenset({int, bool})
+
+def has_usable_text(text):
+    """Check whether the optional text is long enough to analyze"""
+    return bool(text) and len(text.strip()) >= MIN_TEXT_LENGTH
+
+def validate_prediction_request(data):
     """
-    Combine quiz (Likert scale) and text predictions
+    Validate one prediction payload
     
     Args:
-        answers: List of integers (1-5) representing user responses
-        test_type: 'short' or 'full'
-        text: Optional text input from user
-        quiz_weight: How much to trust quiz vs text (0.7 = 70% quiz, 30% text)
+        data: Decoded JSON object with answers, test_type and text
     
     Returns:
-        Tuple of (mbti_type, scores_dict)
+        Error message string, or None if the payload is valid
     """
-    # Get quiz scores (0-1 for each dimension)
-    quiz_scores = score_quiz(answers, test_type)
+    if not data or not isinstance(data, dict):
+        return 'No data provided'
     
-    # If no text provided, just use quiz
-    if not text or len(text.strip()) < 50:
-        mbti_type = scores_to_mbti(quiz_scores)
-        return mbti_type, quiz_scores
+    answers = data.get('answers')
+    test_type = data.get('test_type', 'short')
+    text = data.get('text')
     
-    # Get text prediction
-    text_result = predict_mbti(text)
+    if not answers:
+        return 'Answers required'
+    
+    if not isinstance(answers, list):
+        return 'Answers must be a list'
+    
+    # Validate answer values with two C-level set passes instead of a
+    # Python loop; the type check keeps 1.0 from passing as 1
+    try:
+        valid = VALID_ANSWERS.issuperset(answers) and ANSWER_TYPES.issuperset(map(type, answers))
+    except TypeError:
+        valid = False
+    if not valid:
+        return 'All answers must be integers between 1 and 5'
+    
+    if test_type not in get_question_bank().test_types():
+        return 'Invalid test type. Use "short" or "full"'
+    
+    num_questions = get_question_bank().get(test_type).num_questions
+    if len(answers) < num_questions:
+        return f'The {test_type} test needs {num_questions} answers'
+    
+    if text is not None and not isinstance(text, str):
+        return 'Text must be a string'
     
-    # Extract text scores and normalize them
+    return None
+
+def text_result_to_scores(text_result):
+    """
+    Convert a predict_mbti result into 0-1 dimension scores
+    
+    Args:
+        text_result: Dictionary returned by predict_mbti
+    
+    Returns:
+        Dict with values 0-1 where 1 = first trait (I, N, T, J)
+    """
     text_scores = {}
-    for dim in ['I-E', 'N-S', 'T-F', 'J-P']:
+    for dim in DIMENSIONS:
         letter = text_result['dimensions'][dim]['letter']
         confidence = text_result['dimensions'][dim]['confidence']
         
         # Convert to 0-1 scale where 1 = first trait (I, N, T, J)
-        if dim == 'I-E':
-            text_scores[dim] = confidence if letter == 'I' else (1 - confidence)
-        elif dim == 'N-S':
-            text_scores[dim] = confidence if letter == 'N' else (1 - confidence)
-        elif dim == 'T-F':
-            text_scores[dim] = confidence if letter == 'T' else (1 - confidence)
-        elif dim == 'J-P':
-            text_scores[dim] = confidence if letter == 'J' else (1 - confidence)
-    
-    # Combine scores using weighted average
+        text_scores[dim] = confidence if letter == dim[0] else (1 - confidence)
+    
+    return text_scores
+
+def blend_scores(quiz_scores, text_scores, quiz_weight=0.7):
+    """Combine quiz and text scores using a weighted average"""
     text_weight = 1 - quiz_weight
     combined_scores = {}
     
-    for dim in ['I-E', 'N-S', 'T-F', 'J-P']:
+    for dim in DIMENSIONS:
         combined_scores[dim] = (
             quiz_scores[dim] * quiz_weight +
             text_scores[dim] * text_weight
         )
     
-    mbti_type = scores_to_mbti(combined_scores)
+    return combined_scores
+
+def combine_predictions_likert(answers, test_type='short', text=None, quiz_weight=0.7):
+    """
+    Combine quiz (Likert scale) and text predictions
+    
+    Args:
+        answers: List of integers (1-5) representing user responses
+        test_type: 'short' or 'full'
+        text: Optional text input from user
+        quiz_weight: How much to trust quiz vs text (0.7 = 70% quiz, 30% text)
+    
+    Returns:
+        Tuple of (mbti_type, scores_dict)
+    """
+    # Get quiz scores (0-1 for each dimension)
+    with timed('score_quiz'):
+        quiz_scores = score_quiz(answers, test_type)
+    
+    return combine_quiz_scores(quiz_scores, text, quiz_weight)
+
+def combine_quiz_scores(quiz_scores, text=None, quiz_weight=0.7):
+    """
+    Combine already computed quiz scores with an optional text prediction
+    
+    Used directly by quiz sessions, whose running sums already hold the
+    final quiz scores.
+    
+    Returns:
+        Tuple of (mbti_type, scores_dict)
+    """
+    # If no text provided, just use quiz
+    if not has_usable_text(text):
+        mbti_type = scores_to_mbti(quiz_scores)
+        return mbti_type, quiz_scores
+    
+    # Get text prediction
+    with timed('predict_text'):
+        text_scores = text_result_to_scores(predict_mbti(text))
+    
+    with timed('combine'):
+        combined_scores = blend_scores(quiz_scores, text_scores, quiz_weight)
+        mbti_type = scores_to_mbti(combined_scores)
     return mbti_type, combined_scores
 
+def combine_predictions_explained(answers, test_type='short', text=None, quiz_weight=0.7, top_k=EXPLAIN_TOP_K):
+    """
+    Same as combine_predictions_likert, plus the words behind the text prediction
+    
+    The explanation comes out of the same vectorize/model pass as the
+    text scores.
+    
+    Returns:
+        Tuple of (mbti_type, scores_dict, explanation); explanation is None
+        when there is no usable text
+    """
+    with timed('score_quiz'):
+        quiz_scores = score_quiz(answers, test_type)
+    
+    if not has_usable_text(text):
+        return scores_to_mbti(quiz_scores), quiz_scores, None
+    
+    with timed('predict_text'):
+        text_result = predict_mbti(text, explain=True, top_k=top_k)
+    
+    with timed('combine'):
+        combined_scores = blend_scores(quiz_scores, text_result_to_scores(text_result), quiz_weight)
+        mbti_type = scores_to_mbti(combined_scores)
+    return mbti_type, combined_scores, text_result['explanation']
+
+def combine_predictions_likert_batch(records, quiz_weight=0.7):
+    """
+    Combine quiz and text predictions for many respondents at once
+    
+    Quiz answers are scored with one score_quiz_batch call per test type
+    and all usable texts go through a single predict_mbti_batch pass.
+    
+    Args:
+        records: List of dicts with 'answers', optional 'test_type' and 'text'
+        quiz_weight: How much to trust quiz vs text (0.7 = 70% quiz, 30% text)
+    
+    Returns:
+        List of (mbti_type, scores_dict) tuples in input order
+    """
+    # Score quizzes grouped by test type
+    quiz_scores = [None] * len(records)
+    by_test_type = {}
+    for i, record in enumerate(records):
+        by_test_type.setdefault(record.get('test_type', 'short'), []).append(i)
+    
+    with timed('score_quiz'):
+        for test_type, indices in by_test_type.items():
+            num_questions = get_question_bank().get(test_type).num_questions
+            matrix = np.array([records[i]['answers'][:num_questions] for i in indices])
+            for i, row in zip(indices, score_quiz_batch(matrix, test_type)):
+                quiz_scores[i] = {dim: float(score) for dim, score in zip(DIMENSIONS, row)}
+    
+    # Analyze every usable text in one pass
+    text_indices = [i for i, record in enumerate(records) if has_usable_text(record.get('text'))]
+    text_results = predict_mbti_batch([records[i]['text'] for i in text_indices])
+    text_scores = dict(zip(text_indices, map(text_result_to_scores, text_results)))
+    
+    combined = []
+    for i, scores in enumerate(quiz_scores):
+        if i in text_scores:
+            scores = blend_scores(scores, text_scores[i], quiz_weight)
+        combined.append((scores_to_mbti(scores), scores))
+    
+    return combined
+
 def scores_to_mbti(scores):
     """
     Convert dimension scores to MBTI type
@@ -1,181 +1,579 @@
+import argparse
+import csv
+import hashlib
+import heapq
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter
+import pickle
+import time
+from contextlib import contextmanager
+
 import pandas as pd
 import numpy as np
-import re
-import nltk
-from nltk.corpus import stopwords
+import scipy.sparse as sp
+import sklearn
+from joblib import Parallel, delayed
 from sklearn.feature_extraction.text import TfidfVectorizer
-
-df = pd.read_csv('mbti_1.csv')
-
-print(df.head())
-
-print(df['type'].value_counts())
-
-nltk.download('stopwords')
-stop_words = set(stopwords.words('english'))
-
-def clean_text(text):
-    text = re.sub(r"http\S+", "", text)
-    text = re.sub(r"[^a-zA-Z\s]", "", text)
-    text = text.lower()
-    words = [word for word in text.split() if word not in stop_words]
-    return " ".join(words)
-
-df['cleaned_posts'] = df['posts'].apply(clean_text)
-
-print(df[['type', 'cleaned_posts']].head())
-
-# Extract individual MBTI dimensions from the type
-
-# If first letter is 'I', mark as 1, otherwise 0
-df['I-E'] = df['type'].apply(lambda x: 1 if x[0] == 'I' else 0)
-
-# If second letter is 'N', mark as 1, otherwise 0
-df['N-S'] = df['type'].apply(lambda x: 1 if x[1] == 'N' else 0)
-
-# If third letter is 'T', mark as 1, otherwise 0
-df['T-F'] = df['type'].apply(lambda x: 1 if x[2] == 'T' else 0)
-
-# If fourth letter is 'J', mark as 1, otherwise 0
-df['J-P'] = df['type'].apply(lambda x: 1 if x[3] == 'J' else 0)
-
-# Distribution of each dimension
-print("\n--- Dimension Distributions ---")
-print(f"Introversion (I=1): {df['I-E'].sum()} | Extraversion (E=0): {len(df) - df['I-E'].sum()}")
-print(f"Intuition (N=1): {df['N-S'].sum()} | Sensing (S=0): {len(df) - df['N-S'].sum()}")
-print(f"Thinking (T=1): {df['T-F'].sum()} | Feeling (F=0): {len(df) - df['T-F'].sum()}")
-print(f"Judging (J=1): {df['J-P'].sum()} | Perceiving (P=0): {len(df) - df['J-P'].sum()}")
-
-# Verify it works
-print("\n--- Sample Types with Dimensions ---")
-print(df[['type', 'I-E', 'N-S', 'T-F', 'J-P']].head(10))
-
-print("\n--- Vectorizing Text ---")
-
-# Vectorizer
-vectorizer = TfidfVectorizer(
-    max_features=3000,
-    min_df=5,
-    max_df=0.7
-)
-
-# Transform the text into numbers
-X = vectorizer.fit_transform(df['cleaned_posts'])
-
-print(f"Text vectorized! Shape: {X.shape}")
-print(f"This means: {X.shape[0]} posts, {X.shape[1]} features (words)")
-
-
 from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import accuracy_score, classification_report
 
-print("\n--- Training Model for I-E Dimension ---")
-y_ie = df['I-E']
-print(f"We're trying to predict: {y_ie.value_counts().to_dict()}")
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y_ie, test_size=0.2, random_state=42, stratify=y_ie
-)
-
-print(f"\nTraining set: {X_train.shape[0]} people")
-print(f"Test set: {X_test.shape[0]} people")
-
-model_ie = LogisticRegression(max_iter=1000) 
-print("\nTeaching the computer... (this might take a minute)")
-model_ie.fit(X_train, y_train) 
-print("Done learning!")
-
-y_pred = model_ie.predict(X_test)  
-accuracy = accuracy_score(y_test, y_pred)
-print(f"\n✨ Accuracy: {accuracy:.4f} ({accuracy*100:.2f}%)")
-print("\n--- Detailed Results ---")
-print(classification_report(y_test, y_pred, target_names=['Extravert (E)', 'Introvert (I)']))
-
-print("\n--- Training Model for N-S Dimension ---")
-y_ns = df['N-S']
-print(f"We're trying to predict: {y_ns.value_counts().to_dict()}")
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y_ns, test_size=0.2, random_state=42, stratify=y_ns
-)
-
-print(f"\nTraining set: {X_train.shape[0]} people")
-print(f"Test set: {X_test.shape[0]} people")
-
-model_ns = LogisticRegression(max_iter=1000) 
-print("\nTeaching the computer... (this might take a minute)")
-model_ns.fit(X_train, y_train)  
-print("Done learning!")
-
-y_pred = model_ns.predict(X_test)  
-accuracy = accuracy_score(y_test, y_pred)
-print(f"\n✨ Accuracy: {accuracy:.4f} ({accuracy*100:.2f}%)")
-print("\n--- Detailed Results ---")
-print(classification_report(y_test, y_pred, target_names=['Intuitive (N)', 'Sensing (S)']))
-
-print("\n--- Training Model for T-F Dimension ---")
-y_tf = df['T-F']
-print(f"We're trying to predict: {y_tf.value_counts().to_dict()}")
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y_tf, test_size=0.2, random_state=42, stratify=y_tf
-)
-
-print(f"\nTraining set: {X_train.shape[0]} people")
-print(f"Test set: {X_test.shape[0]} people")
-
-model_tf = LogisticRegression(max_iter=1000) 
-print("\nTeaching the computer... (this might take a minute)")
-model_tf.fit(X_train, y_train)  
-print("Done learning!")
-
-y_pred = model_tf.predict(X_test)  
-accuracy = accuracy_score(y_test, y_pred)
-print(f"\n✨ Accuracy: {accuracy:.4f} ({accuracy*100:.2f}%)")
-print("\n--- Detailed Results ---")
-print(classification_report(y_test, y_pred, target_names=['Thinking (T)', 'Feeling (F)']))
-
-print("\n--- Training Model for J-P Dimension ---")
-y_jp = df['J-P']
-print(f"We're trying to predict: {y_jp.value_counts().to_dict()}")
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y_jp, test_size=0.2, random_state=42, stratify=y_jp
-)
-
-print(f"\nTraining set: {X_train.shape[0]} people")
-print(f"Test set: {X_test.shape[0]} people")
-
-model_jp = LogisticRegression(max_iter=1000) 
-print("\nTeaching the computer... (this might take a minute)")
-model_jp.fit(X_train, y_train)  
-print("Done learning!")
-
-y_pred = model_jp.predict(X_test)  
-accuracy = accuracy_score(y_test, y_pred)
-print(f"\n✨ Accuracy: {accuracy:.4f} ({accuracy*100:.2f}%)")
-print("\n--- Detailed Results ---")
-print(classification_report(y_test, y_pred, target_names=['Judging (J)', 'Perceiving (P)']))
+from inference import LinearTextModel
+import tokenizer
+from tokenizer import clean_series, get_stop_words
 
-import pickle
-print("\n--- Saving All Models ---")
-
-# Save the vectorizer
-with open('tfidf_vectorizer.pkl', 'wb') as f:
-    pickle.dump(vectorizer, f)
-print("✓ Saved: tfidf_vectorizer.pkl")
-
-# Save all 4 MODELS 
-models_dict = {
-    'I-E': model_ie,  
-    'N-S': model_ns,  
-    'T-F': model_tf,  
-    'J-P': model_jp   
+DIMENSIONS = ['I-E', 'N-S', 'T-F', 'J-P']
+
+# Letter marked as 1 for each dimension, and report labels for classes (0, 1)
+DIMENSION_LABELS = {
+    'I-E': ('I', ['Extravert (E)', 'Introvert (I)']),
+    'N-S': ('N', ['Sensing (S)', 'Intuitive (N)']),
+    'T-F': ('T', ['Feeling (F)', 'Thinking (T)']),
+    'J-P': ('J', ['Perceiving (P)', 'Judging (J)'])
 }
 
-with open('mbti_models.pkl', 'wb') as f:
-    pickle.dump(models_dict, f)
-print("✓ Saved: mbti_models.pkl")
+# Vocabulary limits, shared by the in-memory and streaming modes
+VECTORIZER_SETTINGS = {
+    'max_features': 3000,
+    'min_df': 5,
+    'max_df': 0.7
+}
 
-print("\n🎉 All done! You can now use these models for predictions!")
\ No newline at end of file
+# Every TEST_EVERY-th row is held out for evaluation in streaming mode
+TEST_EVERY = 5
+
+# Directory of the pickle-free model artifact
+ARTIFACT_DIR = 'model_artifact'
+
+# Rows per cleaning task sent to a worker process
+CLEAN_CHUNK_SIZE = 500
+
+# Cleaned corpora and TF-IDF matrices from earlier runs, one directory per cache key
+CACHE_DIR = '.echotype_cache'
+
+# Where --compact writes the pruned, quantized model
+COMPACT_ARTIFACT_DIR = 'model_artifact_compact'
+
+stage_times = {}
+
+@contextmanager
+def stage(name):
+    """Time one stage of the training run and remember its wall time"""
+    start = time.perf_counter()
+    yield
+    stage_times[name] = time.perf_counter() - start
+    print(f"⏱  {name}: {stage_times[name]:.2f}s")
+
+def clean_posts_parallel(posts, workers):
+    """
+    Clean the posts column in parallel chunks
+
+    Args:
+        posts: pandas Series of raw posts
+        workers: Number of worker processes
+
+    Returns:
+        pandas Series of cleaned posts with the same index
+    """
+    if workers == 1:
+        return clean_series(posts)
+
+    chunks = [posts.iloc[i:i + CLEAN_CHUNK_SIZE] for i in range(0, len(posts), CLEAN_CHUNK_SIZE)]
+    cleaned = Parallel(n_jobs=workers)(delayed(clean_series)(chunk) for chunk in chunks)
+    return pd.concat(cleaned)
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 of a file's contents, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def corpus_cache_key(csv_path):
+    """
+    Key for the preprocessed corpus of a CSV
+
+    Covers everything the cleaned text and the TF-IDF matrix depend on: the
+    input bytes, the cleaning code and stopword list, the vectorizer
+    settings and the scikit-learn version the vectorizer is pickled with.
+    """
+    digest = hashlib.sha256(file_digest(csv_path).encode())
+    digest.update(json.dumps({
+        'tokenizer': file_digest(tokenizer.__file__),
+        'stop_words': sorted(get_stop_words()),
+        'vectorizer': VECTORIZER_SETTINGS,
+        'sklearn': sklearn.__version__
+    }, sort_keys=True).encode())
+    return digest.hexdigest()[:32]
+
+def load_corpus_cache(directory):
+    """
+    Read a corpus written by save_corpus_cache
+
+    Returns:
+        Tuple of (DataFrame with type and cleaned_posts, X, vectorizer),
+        or None when the entry does not exist
+    """
+    if not os.path.exists(os.path.join(directory, 'meta.json')):
+        return None
+
+    df = pd.read_csv(
+        os.path.join(directory, 'cleaned.tsv'), sep='\t', names=['type', 'cleaned_posts'],
+        dtype=str, keep_default_na=False, quoting=csv.QUOTE_NONE
+    )
+    X = sp.load_npz(os.path.join(directory, 'features.npz'))
+    with open(os.path.join(directory, 'vectorizer.pkl'), 'rb') as f:
+        vectorizer = pickle.load(f)
+    return df, X, vectorizer
+
+def save_corpus_cache(directory, df, X, vectorizer):
+    """
+    Store the cleaned corpus, TF-IDF matrix and fitted vectorizer
+
+    Layout:
+        cleaned.tsv     - one 'type<TAB>cleaned text' line per row
+        features.npz    - the sparse TF-IDF matrix
+        vectorizer.pkl  - fitted TfidfVectorizer (vocabulary and idf)
+        meta.json       - written last; an entry without it is incomplete
+
+    The entry is built in a temporary directory and renamed into place,
+    so an interrupted run never leaves a half-written entry behind.
+    """
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent)
+    try:
+        # Cleaned text is only letters and spaces, so tabs and newlines are safe separators
+        with open(os.path.join(staging, 'cleaned.tsv'), 'w') as f:
+            for mbti_type, text in zip(df['type'], df['cleaned_posts']):
+                f.write(f"{mbti_type}\t{text}\n")
+        sp.save_npz(os.path.join(staging, 'features.npz'), X)
+        with open(os.path.join(staging, 'vectorizer.pkl'), 'wb') as f:
+            pickle.dump(vectorizer, f)
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump({'rows': X.shape[0], 'features': X.shape[1], 'created': time.time()}, f)
+        if os.path.exists(directory):
+            # Another run stored the same key first
+            shutil.rmtree(staging)
+        else:
+            os.replace(staging, directory)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+def add_dimension_labels(df):
+    """Extract individual MBTI dimensions from the type (1 = first letter)"""
+    for position, dim in enumerate(DIMENSIONS):
+        letter = DIMENSION_LABELS[dim][0]
+        df[dim] = (df['type'].str[position] == letter).astype(int)
+
+def train_dimension(X, y, dim):
+    """
+    Train and evaluate the model for one dimension
+
+    The train/test split is computed on row indices so that the shared
+    feature matrix is only sliced, never re-split as a whole.
+
+    Args:
+        X: Sparse TF-IDF matrix shared by all dimensions
+        y: Numpy array of 0/1 labels for this dimension
+        dim: Dimension name, e.g. 'I-E'
+
+    Returns:
+        Dict with the fitted model and its evaluation
+    """
+    start = time.perf_counter()
+    train_idx, test_idx = train_test_split(
+        np.arange(X.shape[0]), test_size=0.2, random_state=42, stratify=y
+    )
+
+    model = LogisticRegression(max_iter=1000)
+    model.fit(X[train_idx], y[train_idx])
+
+    y_pred = model.predict(X[test_idx])
+    return {
+        'dimension': dim,
+        'model': model,
+        'test_idx': test_idx,
+        'train_size': len(train_idx),
+        'test_size': len(test_idx),
+        'accuracy': accuracy_score(y[test_idx], y_pred),
+        'report': classification_report(y[test_idx], y_pred, target_names=DIMENSION_LABELS[dim][1]),
+        'seconds': time.perf_counter() - start
+    }
+
+def save_models(vectorizer, models_dict):
+    """Write the pickles and the pickle-free artifact used by predict.py"""
+    print("\n--- Saving All Models ---")
+    with stage('save'):
+        # Save the vectorizer
+        with open('tfidf_vectorizer.pkl', 'wb') as f:
+            pickle.dump(vectorizer, f)
+        print("✓ Saved: tfidf_vectorizer.pkl")
+
+        # Save all 4 MODELS
+        with open('mbti_models.pkl', 'wb') as f:
+            pickle.dump(models_dict, f)
+        print("✓ Saved: mbti_models.pkl")
+
+        # Pickle-free, memory-mappable copy loaded by predict.py
+        LinearTextModel.from_models(vectorizer, models_dict).save_artifact(ARTIFACT_DIR)
+        print(f"✓ Saved: {ARTIFACT_DIR}/")
+
+def select_compact_terms(models_dict, n_features):
+    """
+    Feature indices of the n_features terms that matter most to any dimension
+
+    Terms are ranked by their largest absolute coefficient across the four
+    models; the rest barely move any prediction.
+    """
+    weights = np.column_stack([np.abs(models_dict[dim].coef_[0]) for dim in DIMENSIONS]).max(axis=1)
+    return np.sort(np.argsort(-weights, kind='stable')[:n_features])
+
+def artifact_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+def train_compact(df, vectorizer, results, n_features, coef_dtype, workers):
+    """
+    Train and save a pruned, quantized model next to the full one
+
+    Keeps the n_features most influential terms, re-vectorizes with that
+    smaller vocabulary (so row norms match what serving computes), refits
+    the four models and stores the coefficients as coef_dtype. Accuracy
+    on the same held-out rows is reported for the full model, the pruned
+    float model and the quantized model that is actually saved.
+
+    Args:
+        df: DataFrame with cleaned_posts and the dimension label columns
+        vectorizer: Fitted full TfidfVectorizer
+        results: train_dimension results of the full models
+        n_features: Terms to keep
+        coef_dtype: 'float32', 'float16' or 'int8'
+        workers: Number of processes for the four fits
+    """
+    full_models = {result['dimension']: result['model'] for result in results}
+    kept = select_compact_terms(full_models, n_features)
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+
+    print(f"\n--- Compact Model: {len(kept)} of {len(terms)} terms, {coef_dtype} coefficients ---")
+    with stage('compact'):
+        compact_vectorizer = TfidfVectorizer(vocabulary={terms[i]: n for n, i in enumerate(kept)})
+        compact_vectorizer.idf_ = vectorizer.idf_[kept]
+        X = compact_vectorizer.transform(df['cleaned_posts'])
+
+        compact_results = Parallel(n_jobs=min(workers, len(DIMENSIONS)))(
+            delayed(train_dimension)(X, df[dim].to_numpy(), dim) for dim in DIMENSIONS
+        )
+        models = {result['dimension']: result['model'] for result in compact_results}
+        model = LinearTextModel.from_models(compact_vectorizer, models).quantized(coef_dtype)
+        model.save_artifact(COMPACT_ARTIFACT_DIR, coef_dtype)
+
+    print(f"\n{'Dimension':<10} {'full':>8} {'pruned':>8} {coef_dtype:>8} {'change':>8}")
+    probabilities = model.predict_proba(X)
+    for i, (full, compact) in enumerate(zip(results, compact_results)):
+        # Same split (random_state=42, stratified on the same labels) as the full model
+        test_idx = compact['test_idx']
+        y = df[compact['dimension']].to_numpy()[test_idx]
+        quantized = ((probabilities[test_idx, i] > 0.5).astype(int) == y).mean()
+        print(f"{compact['dimension']:<10} {full['accuracy']:>8.4f} {compact['accuracy']:>8.4f} "
+              f"{quantized:>8.4f} {quantized - full['accuracy']:>+8.4f}")
+
+    print(f"\n✓ Saved: {COMPACT_ARTIFACT_DIR}/ ({artifact_size(COMPACT_ARTIFACT_DIR) / 1024:.0f} KB, "
+          f"full model {artifact_size(ARTIFACT_DIR) / 1024:.0f} KB)")
+    print(f"  Serve it with ECHOTYPE_ARTIFACT_DIR={COMPACT_ARTIFACT_DIR}")
+
+def print_stage_times():
+    print("\n--- Wall Time per Stage ---")
+    for name, seconds in stage_times.items():
+        print(f"  {name:<10} {seconds:8.2f}s")
+    print(f"  {'total':<10} {sum(stage_times.values()):8.2f}s")
+
+def train(csv_path='mbti_1.csv', workers=None, cache_dir=CACHE_DIR, compact_features=None, coef_dtype='int8'):
+    """
+    Full training run: load, clean, vectorize, fit and save
+
+    The cleaned corpus and TF-IDF matrix are cached under cache_dir, keyed
+    by corpus_cache_key, so rerunning with only model changes skips
+    straight to fitting.
+
+    Args:
+        csv_path: Path to the Kaggle MBTI CSV
+        workers: Number of processes (defaults to every core)
+        cache_dir: Preprocessing cache directory, or None to disable it
+        compact_features: Also train a compact model with this many terms
+        coef_dtype: Coefficient storage type of the compact model
+    """
+    workers = workers or os.cpu_count() or 1
+
+    cached = None
+    if cache_dir:
+        with stage('cache_read'):
+            entry = os.path.join(cache_dir, corpus_cache_key(csv_path))
+            cached = load_corpus_cache(entry)
+
+    if cached is not None:
+        print(f"♻️  Using cached corpus and TF-IDF matrix from {entry}")
+        df, X, vectorizer = cached
+    else:
+        with stage('load'):
+            df = pd.read_csv(csv_path)
+
+        print(df.head())
+
+        # Same cleaning as predict.py, shared through tokenizer.py
+        with stage('clean'):
+            df['cleaned_posts'] = clean_posts_parallel(df['posts'], workers)
+
+    print(df['type'].value_counts())
+    print(df[['type', 'cleaned_posts']].head())
+
+    add_dimension_labels(df)
+
+    # Distribution of each dimension
+    print("\n--- Dimension Distributions ---")
+    print(f"Introversion (I=1): {df['I-E'].sum()} | Extraversion (E=0): {len(df) - df['I-E'].sum()}")
+    print(f"Intuition (N=1): {df['N-S'].sum()} | Sensing (S=0): {len(df) - df['N-S'].sum()}")
+    print(f"Thinking (T=1): {df['T-F'].sum()} | Feeling (F=0): {len(df) - df['T-F'].sum()}")
+    print(f"Judging (J=1): {df['J-P'].sum()} | Perceiving (P=0): {len(df) - df['J-P'].sum()}")
+
+    # Verify it works
+    print("\n--- Sample Types with Dimensions ---")
+    print(df[['type', 'I-E', 'N-S', 'T-F', 'J-P']].head(10))
+
+    if cached is None:
+        print("\n--- Vectorizing Text ---")
+
+        # Vectorizer
+        vectorizer = TfidfVectorizer(**VECTORIZER_SETTINGS)
+
+        # Transform the text into numbers
+        with stage('vectorize'):
+            X = vectorizer.fit_transform(df['cleaned_posts'])
+
+        if cache_dir:
+            with stage('cache_save'):
+                save_corpus_cache(entry, df, X, vectorizer)
+            print(f"✓ Cached preprocessing: {entry}/")
+
+    print(f"Text vectorized! Shape: {X.shape}")
+    print(f"This means: {X.shape[0]} posts, {X.shape[1]} features (words)")
+
+    # The four fits are independent; joblib memory-maps X for the workers
+    # instead of pickling a copy per task
+    print(f"\n--- Training 4 Dimension Models ({min(workers, 4)} in parallel) ---")
+    with stage('train'):
+        results = Parallel(n_jobs=min(workers, len(DIMENSIONS)))(
+            delayed(train_dimension)(X, df[dim].to_numpy(), dim) for dim in DIMENSIONS
+        )
+
+    for result in results:
+        print(f"\n--- Model for {result['dimension']} Dimension ---")
+        print(f"Training set: {result['train_size']} people")
+        print(f"Test set: {result['test_size']} people")
+        print(f"Fit time: {result['seconds']:.2f}s")
+        print(f"\n✨ Accuracy: {result['accuracy']:.4f} ({result['accuracy']*100:.2f}%)")
+        print("\n--- Detailed Results ---")
+        print(result['report'])
+
+    models_dict = {result['dimension']: result['model'] for result in results}
+
+    save_models(vectorizer, models_dict)
+    if compact_features:
+        train_compact(df, vectorizer, results, compact_features, coef_dtype, workers)
+    print_stage_times()
+
+    print("\n🎉 All done! You can now use these models for predictions!")
+
+def select_vocabulary(term_counts, doc_counts, n_docs, max_features, min_df, max_df):
+    """
+    Pick the vocabulary like TfidfVectorizer does, but from streamed counts
+
+    Terms must appear in at least min_df documents and in at most a max_df
+    fraction of them; the max_features most frequent terms are kept and
+    indexed in alphabetical order.
+
+    Returns:
+        Dict mapping term -> feature index
+    """
+    max_doc_count = max_df * n_docs
+    eligible = sorted(term for term, count in doc_counts.items() if min_df <= count <= max_doc_count)
+    if max_features is not None and len(eligible) > max_features:
+        # Same cut as sklearn's _limit_features, down to the float64 counts
+        # and the argsort it uses, so ties at the cutoff break the same way
+        counts = np.array([term_counts[term] for term in eligible], dtype=np.float64)
+        eligible = [eligible[i] for i in np.sort((-counts).argsort()[:max_features])]
+    return {term: index for index, term in enumerate(eligible)}
+
+def prune_counts(term_counts, doc_counts, keep):
+    """
+    Keep only the `keep` most frequent terms of the streamed counts
+
+    Bounds memory on corpora with an open-ended vocabulary at the price of
+    exactness: a dropped term that turns common later restarts from zero.
+
+    Returns:
+        New (term_counts, doc_counts) Counters
+    """
+    kept = heapq.nlargest(keep, term_counts.items(), key=lambda item: item[1])
+    return Counter(dict(kept)), Counter({term: doc_counts[term] for term, _ in kept})
+
+def iter_spool(path, chunksize):
+    """
+    Stream the cleaned-text spool written by the first streaming pass
+
+    Yields:
+        (first_row, types, texts) for every chunk of rows
+    """
+    types = []
+    texts = []
+    first_row = 0
+    with open(path, 'r') as f:
+        for line in f:
+            mbti_type, _, text = line.rstrip('\n').partition('\t')
+            types.append(mbti_type)
+            texts.append(text)
+            if len(types) == chunksize:
+                yield first_row, types, texts
+                first_row += len(types)
+                types, texts = [], []
+    if types:
+        yield first_row, types, texts
+
+def dimension_labels(types, dim):
+    """0/1 labels for one dimension from a list of 4-letter types"""
+    position = DIMENSIONS.index(dim)
+    letter = DIMENSION_LABELS[dim][0]
+    return np.array([1 if mbti_type[position] == letter else 0 for mbti_type in types])
+
+def train_streaming(csv_path='mbti_1.csv', workers=None, chunksize=2000, epochs=5, alpha=1e-5,
+                    max_candidates=None):
+    """
+    Out-of-core training run for corpora larger than RAM
+
+    The CSV is read in chunks and cleaned on the fly; cleaned text goes to a
+    temporary spool file on disk while term and document frequencies are
+    counted. The vocabulary and idf weights are then derived from those
+    counts, and one SGDClassifier per dimension is trained with
+    partial_fit over the spool. Peak memory does not grow with the number
+    of rows, but the term counts grow with the number of distinct tokens.
+    max_candidates caps them (pruned after each chunk); without it the
+    vocabulary is exactly what TfidfVectorizer would pick.
+
+    Args:
+        csv_path: Path to the MBTI CSV
+        workers: Number of processes used for cleaning each chunk
+        chunksize: Rows held in memory at a time
+        epochs: Passes of partial_fit over the training rows
+        alpha: SGDClassifier regularization strength
+        max_candidates: Most distinct terms to keep counting, or None for exact counts
+    """
+    workers = workers or os.cpu_count() or 1
+    term_counts = Counter()
+    doc_counts = Counter()
+    n_docs = 0
+
+    with tempfile.TemporaryDirectory() as spool_dir:
+        spool_path = os.path.join(spool_dir, 'cleaned.tsv')
+
+        print(f"\n--- Streaming {csv_path} in chunks of {chunksize} rows ---")
+        with stage('clean'), open(spool_path, 'w') as spool:
+            for chunk in pd.read_csv(csv_path, chunksize=chunksize, usecols=['type', 'posts']):
+                cleaned = clean_posts_parallel(chunk['posts'], workers)
+                for mbti_type, text in zip(chunk['type'], cleaned):
+                    # Same tokens TfidfVectorizer's default pattern keeps (2+ letters)
+                    tokens = [token for token in text.split() if len(token) > 1]
+                    term_counts.update(tokens)
+                    doc_counts.update(set(tokens))
+                    spool.write(f"{mbti_type}\t{text}\n")
+                n_docs += len(chunk)
+                if max_candidates and len(term_counts) > max_candidates:
+                    term_counts, doc_counts = prune_counts(term_counts, doc_counts, max_candidates)
+                print(f"  cleaned {n_docs} rows ({len(term_counts)} distinct terms)")
+
+        print("\n--- Building Vocabulary ---")
+        with stage('vectorize'):
+            vocabulary = select_vocabulary(term_counts, doc_counts, n_docs, **VECTORIZER_SETTINGS)
+            terms = sorted(vocabulary, key=vocabulary.get)
+            df_counts = np.array([doc_counts[term] for term in terms], dtype=np.float64)
+
+            # Smoothed idf, as TfidfVectorizer computes it
+            vectorizer = TfidfVectorizer(vocabulary=vocabulary)
+            vectorizer.idf_ = np.log((1 + n_docs) / (1 + df_counts)) + 1
+            del term_counts, doc_counts
+
+        print(f"Vocabulary: {len(vocabulary)} features from {n_docs} posts")
+
+        models_dict = {
+            dim: SGDClassifier(loss='log_loss', alpha=alpha, random_state=42)
+            for dim in DIMENSIONS
+        }
+
+        print(f"\n--- Training 4 Dimension Models ({epochs} epochs of partial_fit) ---")
+        with stage('train'):
+            for epoch in range(epochs):
+                for first_row, types, texts in iter_spool(spool_path, chunksize):
+                    train_rows = [i for i in range(len(types)) if (first_row + i) % TEST_EVERY]
+                    if not train_rows:
+                        continue
+                    X = vectorizer.transform([texts[i] for i in train_rows])
+                    train_types = [types[i] for i in train_rows]
+                    for dim, model in models_dict.items():
+                        model.partial_fit(X, dimension_labels(train_types, dim), classes=[0, 1])
+                print(f"  epoch {epoch + 1}/{epochs} done")
+
+        with stage('evaluate'):
+            correct = {dim: 0 for dim in DIMENSIONS}
+            tested = 0
+            for first_row, types, texts in iter_spool(spool_path, chunksize):
+                test_rows = [i for i in range(len(types)) if (first_row + i) % TEST_EVERY == 0]
+                if not test_rows:
+                    continue
+                X = vectorizer.transform([texts[i] for i in test_rows])
+                test_types = [types[i] for i in test_rows]
+                for dim, model in models_dict.items():
+                    correct[dim] += int((model.predict(X) == dimension_labels(test_types, dim)).sum())
+                tested += len(test_rows)
+
+    for dim in DIMENSIONS:
+        accuracy = correct[dim] / tested if tested else 0.0
+        print(f"✨ {dim} accuracy: {accuracy:.4f} ({accuracy*100:.2f}%) on {tested} held-out posts")
+
+    save_models(vectorizer, models_dict)
+    print_stage_times()
+
+    print("\n🎉 All done! You can now use these models for predictions!")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Train the EchoType text models')
+    parser.add_argument('--csv', default='mbti_1.csv', help='Path to the MBTI dataset')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for cleaning and training (default: all cores)')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Out-of-core mode: chunked reading and SGD partial_fit for corpora larger than RAM')
+    parser.add_argument('--chunksize', type=int, default=2000, help='Rows per chunk in streaming mode')
+    parser.add_argument('--epochs', type=int, default=5, help='partial_fit passes in streaming mode')
+    parser.add_argument('--alpha', type=float, default=1e-5, help='SGD regularization in streaming mode')
+    parser.add_argument('--max-candidates', type=int, default=None,
+                        help='Streaming mode: cap distinct terms counted (bounded memory, approximate vocabulary)')
+    parser.add_argument('--cache-dir', default=CACHE_DIR,
+                        help='Where cleaned corpora and TF-IDF matrices are cached between runs')
+    parser.add_argument('--no-cache', action='store_true', help='Always re-clean and re-vectorize')
+    parser.add_argument('--compact', type=int, metavar='N', default=None,
+                        help=f'Also write a compact model with the N most influential terms to {COMPACT_ARTIFACT_DIR}/')
+    parser.add_argument('--coef-dtype', choices=['float32', 'float16', 'int8'], default='int8',
+                        help='Coefficient storage of the compact model (default int8)')
+    args = parser.parse_args()
+
+    if args.streaming and args.compact:
+        parser.error('--compact needs the in-memory corpus and cannot be combined with --streaming')
+    if args.max_candidates and not args.streaming:
+        parser.error('--max-candidates only applies with --streaming')
+
+    if args.streaming:
+        train_streaming(args.csv, args.workers, args.chunksize, args.epochs, args.alpha, args.max_candidates)
+    else:
+        train(args.csv, args.workers, None if args.no_cache else args.cache_dir, args.compact, args.coef_dtype)
@@ -0,0 +1,444 @@
+import json
+import os
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.special import expit
+
+DIMENSIONS = ['I-E', 'N-S', 'T-F', 'J-P']
+
+# Letters for each dimension: (label 1, label 0)
+DIMENSION_LETTERS = {
+    'I-E': ('I', 'E'),
+    'N-S': ('N', 'S'),
+    'T-F': ('T', 'F'),
+    'J-P': ('J', 'P')
+}
+
+# Version 2 added quantized coefficients (coef_dtype and coef_scale.npy)
+ARTIFACT_VERSION = 2
+SUPPORTED_ARTIFACT_VERSIONS = (1, 2)
+
+# Coefficient storage types save_artifact can write
+COEF_DTYPES = ('float32', 'float16', 'int8')
+
+class LinearTextModel:
+    """
+    All four dimension classifiers folded into one linear layer
+
+    The per-dimension LogisticRegression coefficients are stacked into a
+    (n_features x 4) matrix so a single sparse-dense product plus a sigmoid
+    yields every dimension's probability for a whole batch of texts.
+
+    Attributes:
+        vocabulary: Dict mapping term -> feature index
+        idf: (n_features,) float array, or None when idf weighting is off
+        coef: (n_features x 4) float array, columns in DIMENSIONS order
+        intercept: (4,) float array
+        norm: Row normalization of the TF-IDF vectors ('l2', 'l1' or None)
+        sublinear_tf: Whether term counts are replaced by 1 + log(count)
+        vectorizer: Fitted TfidfVectorizer, only set when built from pickles
+        coef_scale: (4,) per-dimension scale for int8 coefficients, else None
+    """
+
+    def __init__(self, vocabulary, idf, coef, intercept, norm='l2', sublinear_tf=False, vectorizer=None,
+                 terms=None, coef_scale=None):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.coef = coef
+        self.coef_scale = coef_scale
+        self.intercept = intercept
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+        self.vectorizer = vectorizer
+        self._terms = terms
+
+    @property
+    def num_features(self):
+        return self.coef.shape[0]
+
+    @property
+    def terms(self):
+        """Terms ordered by feature index (the inverse of vocabulary)"""
+        if self._terms is None:
+            terms = [None] * self.num_features
+            for term, index in self.vocabulary.items():
+                terms[index] = term
+            self._terms = terms
+        return self._terms
+
+    @classmethod
+    def from_models(cls, vectorizer, models):
+        """
+        Build the engine from the pickled per-dimension models
+
+        Args:
+            vectorizer: Fitted TfidfVectorizer
+            models: Dict mapping dimension -> fitted binary LogisticRegression
+
+        Returns:
+            LinearTextModel instance
+        """
+        columns = []
+        intercepts = []
+        for dim in DIMENSIONS:
+            model = models[dim]
+            coef = model.coef_[0]
+            intercept = model.intercept_[0]
+
+            # Scores are always P(label 1); flip models trained with reversed classes
+            if list(model.classes_) != [0, 1]:
+                coef, intercept = -coef, -intercept
+
+            columns.append(coef)
+            intercepts.append(intercept)
+
+        coef = np.ascontiguousarray(np.column_stack(columns))
+        return cls(
+            vocabulary=vectorizer.vocabulary_,
+            idf=vectorizer.idf_ if vectorizer.use_idf else None,
+            coef=coef,
+            intercept=np.array(intercepts),
+            norm=vectorizer.norm,
+            sublinear_tf=vectorizer.sublinear_tf,
+            vectorizer=vectorizer
+        )
+
+    @classmethod
+    def from_artifact(cls, path, mmap=True):
+        """
+        Load the pickle-free artifact written by save_artifact
+
+        Arrays are memory-mapped read-only, so forked workers share the
+        same physical pages and loading takes milliseconds.
+
+        Args:
+            path: Artifact directory
+            mmap: Memory-map the arrays instead of reading them into memory
+
+        Returns:
+            LinearTextModel instance
+        """
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+
+        if meta['version'] not in SUPPORTED_ARTIFACT_VERSIONS:
+            raise ValueError(f"Unsupported model artifact version: {meta['version']}")
+
+        mmap_mode = 'r' if mmap else None
+
+        def load(name):
+            return np.load(os.path.join(path, name), mmap_mode=mmap_mode, allow_pickle=False)
+
+        terms = load('vocabulary.npy')
+        vocabulary = {term: index for index, term in enumerate(terms.tolist())}
+
+        return cls(
+            vocabulary=vocabulary,
+            idf=load('idf.npy') if meta['use_idf'] else None,
+            coef=load('coef.npy'),
+            intercept=load('intercept.npy'),
+            norm=meta['norm'],
+            sublinear_tf=meta['sublinear_tf'],
+            terms=terms,
+            coef_scale=load('coef_scale.npy') if meta.get('coef_dtype') == 'int8' else None
+        )
+
+    def quantized(self, coef_dtype):
+        """
+        Copy of the model with coefficients stored as coef_dtype
+
+        Scores from the copy are exactly what a model saved with
+        save_artifact(path, coef_dtype) will produce, so accuracy can be
+        checked before shipping it.
+        """
+        coef, coef_scale = quantize_coef(self.dequantized_coef(), coef_dtype)
+        return LinearTextModel(
+            vocabulary=self.vocabulary,
+            idf=None if self.idf is None else np.asarray(self.idf, dtype=np.float32),
+            coef=coef,
+            intercept=self.intercept,
+            norm=self.norm,
+            sublinear_tf=self.sublinear_tf,
+            terms=self._terms,
+            coef_scale=coef_scale
+        )
+
+    def dequantized_coef(self):
+        """Coefficients as floats, whatever they are stored as"""
+        return self.coef_rows(slice(None))
+
+    def coef_rows(self, rows):
+        """Coefficient rows (4 weights per feature) for an index, slice or index array"""
+        if self.coef_scale is None:
+            return self.coef[rows]
+        return self.coef[rows] * self.coef_scale
+
+    def save_artifact(self, path, coef_dtype='float32'):
+        """
+        Write the model as plain .npy arrays plus a JSON header
+
+        Layout:
+            meta.json       - format version, TF-IDF settings and coef_dtype
+            vocabulary.npy  - terms ordered by feature index (fixed-width unicode)
+            idf.npy         - float32 idf weights
+            coef.npy        - (n_features x 4) stacked coefficients as coef_dtype
+            coef_scale.npy  - float64 (4,) scales, int8 coefficients only
+            intercept.npy   - float64 (4,) intercepts
+
+        Args:
+            path: Directory to write (created if missing)
+            coef_dtype: 'float32', 'float16' or 'int8' (symmetric, one scale per dimension)
+        """
+        os.makedirs(path, exist_ok=True)
+        coef, coef_scale = quantize_coef(self.dequantized_coef(), coef_dtype)
+
+        # Running servers keep the old files memory-mapped. Overwriting them
+        # in place would change (or truncate) pages under those maps, so
+        # every file is written beside its target and renamed over it: the
+        # old inode lives on until the last map is gone. meta.json goes
+        # last, so a loader never sees a header newer than its arrays.
+        def save(name, array):
+            staging = os.path.join(path, f'.{name}.tmp')
+            with open(staging, 'wb') as f:
+                np.save(f, array)
+            os.replace(staging, os.path.join(path, name))
+
+        save('vocabulary.npy', np.array(self.terms, dtype=str))
+        if self.idf is not None:
+            save('idf.npy', np.asarray(self.idf, dtype=np.float32))
+        save('coef.npy', coef)
+        if coef_scale is not None:
+            save('coef_scale.npy', coef_scale)
+        save('intercept.npy', np.asarray(self.intercept, dtype=np.float64))
+
+        staging = os.path.join(path, '.meta.json.tmp')
+        with open(staging, 'w') as f:
+            json.dump({
+                'version': ARTIFACT_VERSION,
+                'dimensions': DIMENSIONS,
+                'num_features': self.num_features,
+                'norm': self.norm,
+                'sublinear_tf': self.sublinear_tf,
+                'use_idf': self.idf is not None,
+                'coef_dtype': coef_dtype
+            }, f, indent=2)
+        os.replace(staging, os.path.join(path, 'meta.json'))
+
+        # Only now is the old scale file unused by the header on disk
+        if coef_scale is None and os.path.exists(os.path.join(path, 'coef_scale.npy')):
+            os.remove(os.path.join(path, 'coef_scale.npy'))
+
+    def transform(self, cleaned_texts):
+        """Vectorize already-cleaned texts into a sparse TF-IDF matrix"""
+        if self.vectorizer is not None:
+            return self.vectorizer.transform(cleaned_texts)
+        return self.transform_tokens([text.split() for text in cleaned_texts])
+
+    def transform_tokens(self, token_lists):
+        """
+        Vectorize token lists directly, skipping the join/re-split round trip
+
+        Produces the same matrix as the TfidfVectorizer trained in data.py
+        (word unigrams over cleaned text) without needing sklearn.
+
+        Args:
+            token_lists: List of token lists from tokenizer.tokenize
+
+        Returns:
+            (N x n_features) sparse TF-IDF matrix
+        """
+        vocabulary = self.vocabulary
+        indices = []
+        indptr = [0]
+        for tokens in token_lists:
+            for token in tokens:
+                index = vocabulary.get(token)
+                if index is not None:
+                    indices.append(index)
+            indptr.append(len(indices))
+
+        counts = sp.csr_matrix(
+            (np.ones(len(indices)), np.array(indices, dtype=np.int32), np.array(indptr)),
+            shape=(len(token_lists), self.num_features)
+        )
+        counts.sum_duplicates()
+        return self.tfidf(counts)
+
+    def tfidf(self, counts):
+        """
+        Apply the vectorizer's tf, idf and norm settings to raw term counts
+
+        Args:
+            counts: (N x n_features) float CSR matrix of term counts, modified in place
+
+        Returns:
+            The same matrix holding TF-IDF weights
+        """
+        if self.sublinear_tf:
+            np.log(counts.data, counts.data)
+            counts.data += 1
+        if self.idf is not None:
+            counts.data *= self.idf[counts.indices]
+        if self.norm is not None:
+            _normalize_rows(counts, self.norm)
+        return counts
+
+    def predict_proba(self, features):
+        """
+        Probability of the first trait (I, N, T, J) for every row
+
+        Args:
+            features: (N x n_features) sparse TF-IDF matrix
+
+        Returns:
+            (N x 4) float array, columns in DIMENSIONS order
+        """
+        scores = features @ self.coef
+        if self.coef_scale is not None:
+            scores *= self.coef_scale
+        return expit(scores + self.intercept)
+
+    def explain(self, features, probabilities, top_k=5):
+        """
+        Words that pushed each dimension toward its predicted letter
+
+        The model is linear, so a word's contribution to a dimension's logit
+        is its TF-IDF weight times that dimension's coefficient. Only the
+        nonzero entries of each row are touched, and the feature matrix is
+        the one predict_proba already used.
+
+        Args:
+            features: (N x n_features) sparse TF-IDF matrix
+            probabilities: (N x 4) output of predict_proba for those rows
+            top_k: Words to keep per dimension
+
+        Returns:
+            One dict per row: dimension -> {'letter', 'words': [{'word', 'weight'}]},
+            words ordered by contribution, strongest first
+        """
+        terms = self.terms
+        explanations = []
+
+        for i, row_probabilities in enumerate(probabilities):
+            start, end = features.indptr[i], features.indptr[i + 1]
+            columns = features.indices[start:end]
+            contributions = features.data[start:end, None] * self.coef_rows(columns)
+
+            explanation = {}
+            for d, (dim, prob) in enumerate(zip(DIMENSIONS, row_probabilities)):
+                positive, negative = DIMENSION_LETTERS[dim]
+                # Positive contributions favour the first letter
+                toward = contributions[:, d] if prob > 0.5 else -contributions[:, d]
+
+                top = np.arange(len(toward))
+                if len(toward) > top_k:
+                    top = np.argpartition(-toward, top_k)[:top_k]
+                top = top[np.argsort(-toward[top], kind='stable')]
+
+                explanation[dim] = {
+                    'letter': positive if prob > 0.5 else negative,
+                    'words': [
+                        {'word': str(terms[columns[j]]), 'weight': float(toward[j])}
+                        for j in top if toward[j] > 0
+                    ]
+                }
+            explanations.append(explanation)
+
+        return explanations
+
+    def predict(self, cleaned_texts):
+        """
+        Predict MBTI types for cleaned texts
+
+        Args:
+            cleaned_texts: List of cleaned strings
+
+        Returns:
+            List of dictionaries with type and confidence scores
+        """
+        if not cleaned_texts:
+            return []
+        return to_results(self.predict_proba(self.transform(cleaned_texts)))
+
+    def predict_tokens(self, token_lists):
+        """Same as predict() but takes token lists from tokenizer.tokenize"""
+        if not token_lists:
+            return []
+        return to_results(self.predict_proba(self.transform_tokens(token_lists)))
+
+def quantize_coef(coef, coef_dtype):
+    """
+    Convert float coefficients to a storage type
+
+    int8 uses one symmetric scale per dimension (column), so every column
+    spans -127..127 and coef ~= stored * scale.
+
+    Returns:
+        Tuple of (stored array, (4,) scale array or None)
+    """
+    if coef_dtype not in COEF_DTYPES:
+        raise ValueError(f"Unsupported coefficient dtype: {coef_dtype}")
+
+    coef = np.asarray(coef, dtype=np.float64)
+    if coef_dtype != 'int8':
+        return coef.astype(coef_dtype), None
+
+    scale = np.abs(coef).max(axis=0) / 127
+    scale[scale == 0] = 1.0
+    return np.round(coef / scale).astype(np.int8), scale
+
+def _normalize_rows(matrix, norm):
+    """
+    Scale each CSR row to unit norm in place, like sklearn's normalize()
+
+    Rows are summed in storage order, which keeps results bit-identical to
+    sklearn without importing it on the serving path.
+    """
+    row_lengths = np.diff(matrix.indptr)
+    rows = np.repeat(np.arange(matrix.shape[0]), row_lengths)
+
+    if norm == 'l2':
+        norms = np.sqrt(np.bincount(rows, weights=matrix.data * matrix.data, minlength=matrix.shape[0]))
+    elif norm == 'l1':
+        norms = np.bincount(rows, weights=np.abs(matrix.data), minlength=matrix.shape[0])
+    else:
+        raise ValueError(f"Unsupported norm: {norm}")
+
+    norms[norms == 0] = 1
+    matrix.data /= np.repeat(norms, row_lengths)
+
+def to_results(probabilities):
+    """
+    Convert an (N x 4) probability array into predict_mbti results
+
+    Args:
+        probabilities: Array of P(first trait) per dimension
+
+    Returns:
+        List of {'type', 'dimensions'} dictionaries
+    """
+    batch_results = []
+    for row in probabilities:
+        results = {}
+        mbti_type = ""
+
+        for dim, prob in zip(DIMENSIONS, row):
+            positive, negative = DIMENSION_LETTERS[dim]
+
+            if prob > 0.5:
+                letter = positive
+                confidence = prob
+            else:
+                letter = negative
+                confidence = 1 - prob
+
+            mbti_type += letter
+            results[dim] = {'letter': letter, 'confidence': confidence}
+
+        batch_results.append({
+            'type': mbti_type,
+            'dimensions': results
+        })
+
+    return batch_results
@@ -0,0 +1,19 @@
+import json
+
+# orjson is optional; it encodes the prediction payloads several times faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps(obj):
+    """Compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def loads(data):
+    """Decode JSON from bytes or str; raises ValueError on malformed input"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,367 @@
+import argparse
+import contextlib
+import http.client
+import itertools
+import json
+import os
+import platform
+import queue
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+# Traffic profiles: scenario -> relative weight
+PROFILES = {
+    'mixed': {'quiz_short': 40, 'quiz_full': 15, 'quiz_text': 25, 'questions': 20},
+    'quiz': {'quiz_short': 70, 'quiz_full': 30},
+    'text': {'quiz_text': 100},
+    'questions': {'questions': 100}
+}
+
+# Free text length in characters is log-normal: most people write a few
+# sentences, a few paste whole essays
+TEXT_MEDIAN_CHARS = 600
+TEXT_SIGMA = 0.8
+TEXT_MAX_CHARS = 8000
+
+class HTTPTarget:
+    """A running server, one keep-alive connection per load thread"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        """Send one request; returns the status code, reading the whole body"""
+        headers = dict(headers or {})
+        if body is not None:
+            body = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+
+        for attempt in range(2):
+            connection = getattr(self._local, 'connection', None)
+            if connection is None:
+                connection = self._local.connection = self.connection_class(self.host, self.port, timeout=60)
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                return response.status
+            except (http.client.HTTPException, ConnectionError):
+                # The server closed an idle keep-alive connection; retry once on a new one
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+
+class InProcessTarget:
+    """app.py's Flask app driven through its test client, no sockets involved"""
+
+    url = 'in-process'
+
+    def __init__(self):
+        from app import app
+
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client.open(path, method=method, json=body, headers=headers).status_code
+
+class TrafficGenerator:
+    """
+    Builds the requests of each scenario
+
+    Answers are uniform 1-5; texts are sentences built from the question
+    bank's wording with log-normal lengths, so they exercise the real
+    vocabulary instead of random tokens.
+    """
+
+    def __init__(self, seed=0):
+        from quiz_scorer import DIMENSIONS, get_question_bank, load_questions
+
+        bank = get_question_bank()
+        self.num_questions = {test_type: bank.get(test_type).num_questions for test_type in ('short', 'full')}
+        questions = load_questions()
+        self.sentences = [
+            question['question'].lower() for dimension in DIMENSIONS for question in questions[dimension]
+        ]
+        self.seed = seed
+        self._local = threading.local()
+        self._thread_numbers = itertools.count()
+
+    @property
+    def rng(self):
+        rng = getattr(self._local, 'rng', None)
+        if rng is None:
+            # One generator per load thread, seeded by its start order for repeatable mixes
+            rng = self._local.rng = random.Random(f'{self.seed}-{next(self._thread_numbers)}')
+        return rng
+
+    def answers(self, test_type):
+        return [self.rng.randint(1, 5) for _ in range(self.num_questions[test_type])]
+
+    def text(self):
+        from combiner import MIN_TEXT_LENGTH
+
+        length = int(self.rng.lognormvariate(np.log(TEXT_MEDIAN_CHARS), TEXT_SIGMA))
+        length = min(max(length, MIN_TEXT_LENGTH), TEXT_MAX_CHARS)
+        parts = []
+        size = 0
+        while size < length:
+            sentence = f"I think {self.rng.choice(self.sentences)}."
+            parts.append(sentence)
+            size += len(sentence) + 1
+        return ' '.join(parts)[:length]
+
+    def build(self, scenario):
+        """
+        Returns:
+            Tuple of (endpoint label, method, path, JSON body or None, headers)
+        """
+        if scenario in ('quiz_short', 'quiz_full'):
+            test_type = scenario[len('quiz_'):]
+            body = {'answers': self.answers(test_type), 'test_type': test_type}
+            return 'POST /api/predict', 'POST', '/api/predict', body, None
+        if scenario == 'quiz_text':
+            test_type = self.rng.choice(['short', 'full'])
+            body = {'answers': self.answers(test_type), 'test_type': test_type, 'text': self.text()}
+            return 'POST /api/predict', 'POST', '/api/predict', body, None
+        if scenario == 'questions':
+            test_type = self.rng.choice(['short', 'full'])
+            return ('GET /api/questions/<test_type>', 'GET', f'/api/questions/{test_type}', None,
+                    {'Accept-Encoding': 'gzip'})
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+def parse_mix(value):
+    """Profile name, or 'scenario=weight,...' for a custom mix"""
+    if value in PROFILES:
+        return dict(PROFILES[value])
+
+    mix = {}
+    for part in value.split(','):
+        scenario, _, weight = part.partition('=')
+        mix[scenario.strip()] = float(weight or 1)
+    unknown = set(mix) - {scenario for profile in PROFILES.values() for scenario in profile}
+    if unknown:
+        raise ValueError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+    return mix
+
+class Recorder:
+    """Collects (scenario, endpoint, seconds, status) samples from all threads"""
+
+    def __init__(self, measure_from):
+        self.measure_from = measure_from
+        self.samples = []
+
+    def send(self, target, generator, scenario, due=None):
+        """
+        Run one request and record its latency
+
+        Latency counts from `due` when given (open loop), otherwise from
+        when the request is sent; building the request is never counted.
+        """
+        endpoint, method, path, body, headers = generator.build(scenario)
+        started = time.perf_counter() if due is None else due
+        try:
+            status = target.request(method, path, body, headers)
+        except Exception:
+            status = 0
+        # list.append is atomic, so threads can share the list
+        if started >= self.measure_from:
+            self.samples.append((scenario, endpoint, time.perf_counter() - started, status))
+
+def run_closed_loop(target, generator, mix, concurrency, duration, warmup):
+    """`concurrency` threads each send their next request as soon as the last returns"""
+    start = time.perf_counter()
+    recorder = Recorder(start + warmup)
+    end = start + warmup + duration
+    scenarios, weights = zip(*mix.items())
+
+    def worker():
+        while time.perf_counter() < end:
+            scenario = generator.rng.choices(scenarios, weights)[0]
+            recorder.send(target, generator, scenario)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder
+
+def run_open_loop(target, generator, mix, rate, duration, warmup, max_workers):
+    """
+    Poisson arrivals at `rate` requests per second, whatever the server does
+
+    Latency is measured from when each request was due, not when a thread
+    got to send it, so time spent queued behind a slow server counts
+    (no coordinated omission). Requests due during the run are all sent,
+    even if that takes longer than `duration`.
+    """
+    start = time.perf_counter()
+    recorder = Recorder(start + warmup)
+    end = start + warmup + duration
+    scenarios, weights = zip(*mix.items())
+    due = queue.Queue()
+
+    def worker():
+        while True:
+            item = due.get()
+            if item is None:
+                return
+            recorder.send(target, generator, *item)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max_workers)]
+    for thread in threads:
+        thread.start()
+
+    rng = random.Random(generator.seed)
+    arrival = start
+    while arrival < end:
+        delay = arrival - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        due.put((rng.choices(scenarios, weights)[0], arrival))
+        arrival += rng.expovariate(rate)
+
+    for _ in threads:
+        due.put(None)
+    for thread in threads:
+        thread.join()
+    return recorder
+
+def summarize(samples, elapsed):
+    """Throughput and latency percentiles (ms) for one group of samples"""
+    latencies = np.array([seconds for _, _, seconds, _ in samples]) * 1000
+    statuses = {}
+    for _, _, _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = sum(count for status, count in statuses.items() if not status.startswith(('2', '3')))
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput': len(samples) / elapsed,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'mean_ms': float(latencies.mean()) if len(latencies) else 0.0,
+        'max_ms': float(latencies.max()) if len(latencies) else 0.0,
+        'status': statuses
+    }
+
+def run(target, mix, duration=30, warmup=5, concurrency=8, rate=None, max_workers=64, seed=0):
+    """
+    Drive the target with a traffic mix and summarize what came back
+
+    Args:
+        target: HTTPTarget or InProcessTarget
+        mix: Dict of scenario -> weight
+        duration: Measured seconds, after `warmup` unmeasured ones
+        concurrency: Threads for the closed-loop mode
+        rate: Requests per second for the open-loop mode (overrides concurrency)
+        max_workers: Threads available to send open-loop requests
+
+    Returns:
+        Report dictionary ready to be dumped as JSON
+    """
+    generator = TrafficGenerator(seed)
+    total_weight = sum(mix.values())
+
+    started = time.perf_counter()
+    if rate:
+        recorder = run_open_loop(target, generator, mix, rate, duration, warmup, max_workers)
+    else:
+        recorder = run_closed_loop(target, generator, mix, concurrency, duration, warmup)
+    # Open-loop runs can overrun while the backlog drains; measure what really happened
+    elapsed = max(time.perf_counter() - started - warmup, duration)
+
+    samples = recorder.samples
+    by_scenario = {}
+    by_endpoint = {}
+    for sample in samples:
+        by_scenario.setdefault(sample[0], []).append(sample)
+        by_endpoint.setdefault(sample[1], []).append(sample)
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'target': target.url,
+            'mode': 'open' if rate else 'closed',
+            'rate': rate,
+            'concurrency': None if rate else concurrency,
+            'max_workers': max_workers if rate else None,
+            'duration': duration,
+            'warmup': warmup,
+            'elapsed': elapsed,
+            'mix': {scenario: weight / total_weight for scenario, weight in mix.items()},
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'total': summarize(samples, elapsed),
+        'scenarios': {name: summarize(group, elapsed) for name, group in sorted(by_scenario.items())},
+        'endpoints': {name: summarize(group, elapsed) for name, group in sorted(by_endpoint.items())}
+    }
+
+def print_report(report, file=sys.stderr):
+    meta = report['meta']
+    load = f"{meta['rate']} req/s open loop" if meta['mode'] == 'open' else f"{meta['concurrency']} concurrent"
+    print(f"\n--- {meta['target']}: {load}, {meta['duration']}s ---", file=file)
+    print(f"  {'':<34} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}", file=file)
+    rows = [('total', report['total'])]
+    rows += [(f"scenario {name}", stats) for name, stats in report['scenarios'].items()]
+    rows += [(name, stats) for name, stats in report['endpoints'].items()]
+    for name, stats in rows:
+        print(f"  {name:<34} {stats['throughput']:>9.1f} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+              f"{stats['p99_ms']:>9.2f} {stats['errors']:>7}", file=file)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='EchoType HTTP load generator')
+    parser.add_argument('--url', help='Base URL of a running server, e.g. http://127.0.0.1:5000')
+    parser.add_argument('--in-process', action='store_true', help="Drive app.py's Flask app without a server")
+    parser.add_argument('--mix', default='mixed',
+                        help=f"Profile ({', '.join(PROFILES)}) or custom weights like quiz_short=3,questions=1")
+    parser.add_argument('--duration', type=float, default=30, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=5, help='Unmeasured seconds before measuring')
+    parser.add_argument('--concurrency', type=int, default=8, help='Closed loop: concurrent clients')
+    parser.add_argument('--rate', type=float, help='Open loop: Poisson arrivals per second (overrides --concurrency)')
+    parser.add_argument('--max-workers', type=int, default=64, help='Open loop: threads sending requests')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for answers, texts and arrivals')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    if bool(args.url) == args.in_process:
+        parser.error('give exactly one of --url or --in-process')
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Keep stdout clean for the JSON report (model loading prints progress)
+    with contextlib.redirect_stdout(sys.stderr):
+        target = InProcessTarget() if args.in_process else HTTPTarget(args.url.rstrip('/'))
+        report = run(target, mix, args.duration, args.warmup, args.concurrency, args.rate,
+                     args.max_workers, args.seed)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Saved: {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
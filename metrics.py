@@ -0,0 +1,322 @@
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# Set ECHOTYPE_METRICS=0 to turn the timing hooks into no-ops
+ENABLED = os.environ.get('ECHOTYPE_METRICS', '1') != '0'
+# Shared directory for multiprocess mode (serve.py sets it): every worker
+# writes its snapshot there and a scrape of any worker merges them all
+METRICS_DIR = os.environ.get('ECHOTYPE_METRICS_DIR')
+# Seconds between snapshot writes; other workers' numbers can lag this much
+METRICS_FLUSH_INTERVAL = float(os.environ.get('ECHOTYPE_METRICS_FLUSH_INTERVAL', 5))
+# Snapshots are <prefix><pid>.json, so the directory may hold other files
+SNAPSHOT_PREFIX = 'echotype-'
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+class Histogram:
+    """
+    Cumulative-bucket histogram, e.g. for latencies or batch sizes
+
+    Attributes:
+        buckets: Sorted upper bounds; an implicit +Inf bucket follows them
+        counts: Observations per bucket (not cumulative)
+        sum: Sum of all observed values
+        count: Number of observations
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        """Cumulative counts per upper bound, plus sum and count"""
+        with self._lock:
+            counts = list(self.counts)
+            total_sum = self.sum
+            total_count = self.count
+
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+
+        return {
+            'buckets': cumulative,
+            'sum': total_sum,
+            'count': total_count
+        }
+
+class LabeledMetric:
+    """
+    One metric family whose children are keyed by label values
+
+    Args:
+        name: Prometheus metric name
+        help_text: One-line description
+        kind: 'counter', 'gauge' or 'histogram'
+        labels: Label names, in the order values are passed to labels()
+        buckets: Histogram bucket bounds (histograms only)
+    """
+
+    def __init__(self, name, help_text, kind, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.label_names = tuple(labels)
+        self.buckets = buckets
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Histogram child for these label values (created on first use)"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, Histogram(self.buckets))
+        return child
+
+    def inc(self, *values, amount=1):
+        with self._lock:
+            self._children[values] = self._children.get(values, 0) + amount
+
+    def set(self, *values, value):
+        with self._lock:
+            self._children[values] = value
+
+    def samples(self):
+        """(suffix, labels dict, value) tuples for the text exposition"""
+        with self._lock:
+            children = list(self._children.items())
+
+        for values, child in sorted(children, key=lambda item: item[0]):
+            labels = dict(zip(self.label_names, values))
+            if self.kind != 'histogram':
+                yield '', labels, child
+                continue
+
+            yield from histogram_samples(labels, child.snapshot())
+
+def histogram_samples(labels, snapshot):
+    """_bucket, _sum and _count samples of a Histogram.snapshot()"""
+    for bound, count in snapshot['buckets']:
+        yield '_bucket', {**labels, 'le': str(bound)}, count
+    yield '_sum', labels, snapshot['sum']
+    yield '_count', labels, snapshot['count']
+
+class Registry:
+    """Holds metric families and collectors, renders Prometheus text format"""
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, help_text, labels=()):
+        return self._add(LabeledMetric(name, help_text, 'counter', labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self._add(LabeledMetric(name, help_text, 'gauge', labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(LabeledMetric(name, help_text, 'histogram', labels, buckets))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """
+        Add a callable evaluated at scrape time
+
+        It returns a list of (name, kind, help, [(labels dict, value), ...])
+        for values that live elsewhere, like cache or batcher counters. For
+        'histogram' families each value is a Histogram.snapshot().
+        """
+        self.collectors.append(collector)
+
+    def collect(self):
+        """(name, kind, help, [(suffix, labels dict, value), ...]) for every family"""
+        families = [
+            (metric.name, metric.kind, metric.help_text, list(metric.samples()))
+            for metric in self.metrics
+        ]
+        for collector in self.collectors:
+            for name, kind, help_text, samples in collector():
+                if kind == 'histogram':
+                    samples = [
+                        sample for labels, snapshot in samples for sample in histogram_samples(labels, snapshot)
+                    ]
+                else:
+                    samples = [('', labels, value) for labels, value in samples]
+                families.append((name, kind, help_text, samples))
+        return families
+
+    def render(self):
+        """
+        All metrics in the Prometheus text exposition format
+
+        In multiprocess mode the families of every worker are merged first.
+        """
+        if METRICS_DIR:
+            self.write_snapshot(METRICS_DIR)
+            families = merge_snapshots(METRICS_DIR)
+        else:
+            families = self.collect()
+
+        lines = []
+        for name, kind, help_text, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{format_labels(labels)} {format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, directory):
+        """Write this process's families to <directory>/echotype-<pid>.json"""
+        path = os.path.join(directory, f'{SNAPSHOT_PREFIX}{os.getpid()}.json')
+        staging = path + '.tmp'
+        with open(staging, 'w') as f:
+            json.dump(self.collect(), f)
+        os.replace(staging, path)
+
+    def start_flusher(self, directory, interval=METRICS_FLUSH_INTERVAL):
+        """Write snapshots every `interval` seconds from a daemon thread (call in each worker)"""
+        def flush():
+            while True:
+                time.sleep(interval)
+                self.write_snapshot(directory)
+
+        self.write_snapshot(directory)
+        threading.Thread(target=flush, name='metrics-flush', daemon=True).start()
+
+def snapshot_files(directory):
+    """(pid, path) of every worker snapshot in directory; other files are left alone"""
+    for path in sorted(glob.glob(os.path.join(directory, f'{SNAPSHOT_PREFIX}*.json'))):
+        pid = os.path.basename(path)[len(SNAPSHOT_PREFIX):-len('.json')]
+        if pid.isdigit():
+            yield int(pid), path
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def merge_snapshots(directory):
+    """
+    Merge the snapshots of all workers, like prometheus_client's multiprocess mode
+
+    Counters and histograms are summed over every snapshot, including
+    workers that have exited, so totals never go backwards. Gauges are
+    per-process values: they get a pid label and only live workers are
+    reported.
+    """
+    merged = {}
+    for pid, path in snapshot_files(directory):
+        try:
+            with open(path, 'r') as f:
+                families = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        for name, kind, help_text, samples in families:
+            _, _, _, values = merged.setdefault(name, (name, kind, help_text, {}))
+            if kind == 'gauge':
+                if not pid_alive(pid):
+                    continue
+                for suffix, labels, value in samples:
+                    values[(suffix, tuple({**labels, 'pid': str(pid)}.items()))] = value
+                continue
+            for suffix, labels, value in samples:
+                key = (suffix, tuple(labels.items()))
+                values[key] = (values.get(key) or 0) + (value or 0)
+
+    return [
+        (name, kind, help_text, [(suffix, dict(labels), value) for (suffix, labels), value in values.items()])
+        for name, kind, help_text, values in merged.values()
+    ]
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label(value)}"' for key, value in labels.items()) + '}'
+
+def format_value(value):
+    if value is None:
+        return 'NaN'
+    return repr(float(value))
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    'echotype_stage_seconds', 'Latency of each prediction stage', ['stage']
+)
+PREDICT_REQUESTS = registry.counter(
+    'echotype_predict_requests_total', 'Prediction requests by endpoint, test type and text presence',
+    ['endpoint', 'test_type', 'text']
+)
+ERRORS = registry.counter(
+    'echotype_errors_total', 'Requests that failed with an unexpected error', ['endpoint']
+)
+MODEL_LOAD_SECONDS = registry.gauge(
+    'echotype_model_load_seconds', 'Time taken to load the text model', ['source']
+)
+
+class _StageTimer:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_SECONDS.labels(self.stage).observe(time.perf_counter() - self.start)
+        return False
+
+_NOOP = nullcontext()
+
+def timed(stage):
+    """
+    Context manager that records the wall time of a stage
+
+    Returns a shared no-op context when metrics are disabled.
+    """
+    if not ENABLED:
+        return _NOOP
+    return _StageTimer(stage)
+
+def count_request(endpoint, test_type, has_text):
+    if ENABLED:
+        PREDICT_REQUESTS.inc(endpoint, str(test_type), 'yes' if has_text else 'no')
+
+def count_error(endpoint):
+    if ENABLED:
+        ERRORS.inc(endpoint)
+
+def record_model_load(source, seconds):
+    MODEL_LOAD_SECONDS.set(source, value=seconds)
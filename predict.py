@@ -1,114 +1,198 @@
-import pickle
-import re
-import nltk
-from nltk.corpus import stopwords
-
-# Load stopwords
-try:
-    stop_words = set(stopwords.words('english'))
-except:
-    nltk.download('stopwords')
-    stop_words = set(stopwords.words('english'))
-
-# Load the vectorizer and models
-print("Loading models...")
-with open('tfidf_vectorizer.pkl', 'rb') as f:
-    vectorizer = pickle.load(f)
-
-with open('mbti_models.pkl', 'rb') as f:
-    models = pickle.load(f)
-
-print("Models loaded!")
-
-# Same cleaning function from data.py
-def clean_text(text):
-    text = re.sub(r"http\S+", "", text)
-    text = re.sub(r"[^a-zA-Z\s]", "", text)
-    text = text.lower()
-    words = [word for word in text.split() if word not in stop_words]
-    return " ".join(words)
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+
+from cache import cache_from_env
+from metrics import record_model_load, timed
+from tokenizer import get_stop_words, tokenize
+
+# Pickle-free model written by data.py; the .pkl files are the fallback.
+# Point ECHOTYPE_ARTIFACT_DIR at model_artifact_compact to serve the compact model
+ARTIFACT_DIR = os.environ.get('ECHOTYPE_ARTIFACT_DIR', 'model_artifact')
+
+# Model state reported by /api/health: 'unloaded', 'loading', 'ready' or 'failed'
+_text_model = None
+_model_state = 'unloaded'
+_model_lock = threading.Lock()
+
+# Four dimension probabilities keyed by a hash of the cleaned text
+text_cache = cache_from_env('ECHOTYPE_TEXT_CACHE', 4096)
+
+# Concurrent predict_mbti calls are merged into one batch when
+# ECHOTYPE_MICROBATCH=1 (window in milliseconds and maximum batch size below)
+MICROBATCH_ENABLED = os.environ.get('ECHOTYPE_MICROBATCH') == '1'
+MICROBATCH_WAIT_MS = float(os.environ.get('ECHOTYPE_MICROBATCH_WAIT_MS', 5))
+MICROBATCH_SIZE = int(os.environ.get('ECHOTYPE_MICROBATCH_SIZE', 64))
+_text_batcher = None
+_batcher_lock = threading.Lock()
+
+# Words returned per dimension when an explanation is requested
+EXPLAIN_TOP_K = 5
+
+def load_text_model():
+    """
+    Load the text model, preferring the memory-mapped artifact
+    
+    Returns:
+        LinearTextModel instance
+    """
+    start = time.perf_counter()
+    from inference import LinearTextModel
+    
+    if os.path.exists(os.path.join(ARTIFACT_DIR, 'meta.json')):
+        model = LinearTextModel.from_artifact(ARTIFACT_DIR)
+        record_model_load('artifact', time.perf_counter() - start)
+        return model
+    
+    import pickle
+    
+    with open('tfidf_vectorizer.pkl', 'rb') as f:
+        vectorizer = pickle.load(f)
+    
+    with open('mbti_models.pkl', 'rb') as f:
+        models = pickle.load(f)
+    
+    # Stack the four models into a single linear layer
+    model = LinearTextModel.from_models(vectorizer, models)
+    record_model_load('pickle', time.perf_counter() - start)
+    return model
+
+def get_text_model():
+    """
+    Return the text model, loading it on first use
+    
+    Nothing heavy (numpy/scipy, pickles, NLTK) is imported until the
+    first text is actually analyzed, so quiz-only traffic never pays for it.
+    """
+    global _text_model, _model_state
+    if _text_model is None:
+        with _model_lock:
+            if _text_model is None:
+                _model_state = 'loading'
+                print("Loading models...")
+                try:
+                    model = load_text_model()
+                    get_stop_words()
+                except Exception:
+                    _model_state = 'failed'
+                    raise
+                _text_model = model
+                _model_state = 'ready'
+                print("Models loaded!")
+    return _text_model
+
+def get_model_state():
+    """Current load state of the text model"""
+    return _model_state
+
+def warm_up():
+    """Load the text model in a background thread"""
+    def load():
+        try:
+            get_text_model()
+        except Exception as e:
+            print(f"Model warm-up failed: {str(e)}")
+    
+    thread = threading.Thread(target=load, name='model-warm-up', daemon=True)
+    thread.start()
+    return thread
+
+def predict_mbti_batch(texts, explain=False, top_k=EXPLAIN_TOP_K):
+    """
+    Predict MBTI types for many texts in one pass
+    
+    All texts are tokenized, and those not already in the cache are
+    vectorized into a single sparse matrix and scored for all four
+    dimensions with one matrix product.
+    
+    Args:
+        texts: List of strings to analyze
+        explain: Also return the top contributing words per dimension;
+                 every text is then vectorized, cached or not
+        top_k: Words per dimension in the explanation
+    
+    Returns:
+        List of dictionaries with type and confidence scores, in input order
+        (plus an 'explanation' entry when explain is set)
+    """
+    from inference import to_results
+    
+    if not texts:
+        return []
+    
+    with timed('clean_text'):
+        token_lists = [tokenize(text) for text in texts]
+    
+    with timed('cache_lookup'):
+        keys = [text_cache_key(tokens) for tokens in token_lists]
+        probabilities = [text_cache.get(key) for key in keys]
+    
+    missing = [i for i, prob in enumerate(probabilities) if prob is None or explain]
+    explanations = None
+    if missing:
+        model = get_text_model()
+        with timed('vectorize'):
+            features = model.transform_tokens([token_lists[i] for i in missing])
+        with timed('model'):
+            computed = model.predict_proba(features)
+        for i, row in zip(missing, computed):
+            probabilities[i] = row.copy()
+            text_cache.set(keys[i], probabilities[i])
+        if explain:
+            with timed('explain'):
+                explanations = model.explain(features, computed, top_k)
+    
+    results = to_results(np.vstack(probabilities))
+    if explanations is not None:
+        for result, explanation in zip(results, explanations):
+            result['explanation'] = explanation
+    return results
+
+def text_cache_key(tokens):
+    """Hash of the cleaned text, used as the prediction cache key"""
+    return hashlib.blake2b(" ".join(tokens).encode(), digest_size=16).digest()
+
+def get_text_batcher():
+    """Return the shared micro-batcher in front of predict_mbti_batch"""
+    global _text_batcher
+    if _text_batcher is None:
+        from batcher import MicroBatcher
+        
+        with _batcher_lock:
+            if _text_batcher is None:
+                _text_batcher = MicroBatcher(
+                    predict_mbti_batch,
+                    max_batch=MICROBATCH_SIZE,
+                    max_wait=MICROBATCH_WAIT_MS / 1000,
+                    name='text-batcher'
+                )
+    return _text_batcher
+
+def get_batcher_stats():
+    """Micro-batcher metrics, or None when batching is disabled or unused"""
+    return _text_batcher.stats() if _text_batcher is not None else None
 
 # The magic prediction function!
-def predict_mbti(text):
+def predict_mbti(text, explain=False, top_k=EXPLAIN_TOP_K):
     """
     Predict MBTI type from text
     
     Args:
         text: String of text to analyze
+        explain: Also return the top contributing words per dimension
+        top_k: Words per dimension in the explanation
     
     Returns:
         Dictionary with type and confidence scores
     """
-    # Step 1: Clean the text
-    cleaned = clean_text(text)
-    
-    # Step 2: Vectorize (turn into numbers)
-    features = vectorizer.transform([cleaned])
-    
-    # Step 3: Predict each dimension
-    results = {}
-    mbti_type = ""
-    
-    # I-E dimension
-    pred_ie = models['I-E'].predict(features)[0]
-    prob_ie = models['I-E'].predict_proba(features)[0]
-    
-    if pred_ie == 1:
-        letter_ie = 'I'
-        confidence_ie = prob_ie[1]
-    else:
-        letter_ie = 'E'
-        confidence_ie = prob_ie[0]
-    
-    mbti_type += letter_ie
-    results['I-E'] = {'letter': letter_ie, 'confidence': confidence_ie}
-    
-    # N-S dimension
-    pred_ns = models['N-S'].predict(features)[0]
-    prob_ns = models['N-S'].predict_proba(features)[0]
-    
-    if pred_ns == 1:
-        letter_ns = 'N'
-        confidence_ns = prob_ns[1]
-    else:
-        letter_ns = 'S'
-        confidence_ns = prob_ns[0]
-    
-    mbti_type += letter_ns
-    results['N-S'] = {'letter': letter_ns, 'confidence': confidence_ns}
-    
-    # T-F dimension
-    pred_tf = models['T-F'].predict(features)[0]
-    prob_tf = models['T-F'].predict_proba(features)[0]
-    
-    if pred_tf == 1:
-        letter_tf = 'T'
-        confidence_tf = prob_tf[1]
-    else:
-        letter_tf = 'F'
-        confidence_tf = prob_tf[0]
-    
-    mbti_type += letter_tf
-    results['T-F'] = {'letter': letter_tf, 'confidence': confidence_tf}
-    
-    # J-P dimension
-    pred_jp = models['J-P'].predict(features)[0]
-    prob_jp = models['J-P'].predict_proba(features)[0]
-    
-    if pred_jp == 1:
-        letter_jp = 'J'
-        confidence_jp = prob_jp[1]
-    else:
-        letter_jp = 'P'
-        confidence_jp = prob_jp[0]
-    
-    mbti_type += letter_jp
-    results['J-P'] = {'letter': letter_jp, 'confidence': confidence_jp}
-    
-    return {
-        'type': mbti_type,
-        'dimensions': results
-    }
+    if explain:
+        return predict_mbti_batch([text], explain=True, top_k=top_k)[0]
+    if MICROBATCH_ENABLED:
+        return get_text_batcher()(text)
+    return predict_mbti_batch([text])[0]
 
 # Test it!
 if __name__ == "__main__":
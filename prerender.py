@@ -0,0 +1,79 @@
+import gzip
+import hashlib
+import json
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+def accepted_encodings(accept_encoding):
+    """Codings listed in an Accept-Encoding header with a q value above 0"""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        coding, *params = [item.strip() for item in part.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+class PrerenderedResponse:
+    """
+    A JSON body serialized and compressed once, served many times
+
+    Holds identity, gzip and (when the brotli package is installed) br
+    encodings of the same payload. Each encoding gets its own strong ETag,
+    derived from a hash of the uncompressed body, so conditional requests
+    can be answered by comparing strings.
+
+    Args:
+        payload: JSON-serializable object
+    """
+
+    def __init__(self, payload):
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()[:32]
+
+        self.bodies = {'identity': body, 'gzip': gzip.compress(body, 9, mtime=0)}
+        if brotli is not None:
+            self.bodies['br'] = brotli.compress(body)
+
+        self.etags = {
+            encoding: f'"{digest}"' if encoding == 'identity' else f'"{digest}-{encoding}"'
+            for encoding in self.bodies
+        }
+
+    def choose_encoding(self, accept_encoding):
+        """Best encoding the client accepts: br, then gzip, then identity"""
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ('br', 'gzip'):
+            if encoding in self.bodies and encoding in accepted:
+                return encoding
+        return 'identity'
+
+    def not_modified(self, if_none_match, encoding):
+        """True when the client already holds this representation"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        tags = {tag.strip() for tag in if_none_match.split(',')}
+        tags |= {tag[2:] for tag in tags if tag.startswith('W/')}
+        return self.etags[encoding] in tags
+
+    def headers(self, encoding, max_age):
+        headers = {
+            'ETag': self.etags[encoding],
+            'Cache-Control': f'public, max-age={max_age}',
+            'Vary': 'Accept-Encoding'
+        }
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return headers
@@ -0,0 +1,128 @@
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Fraction of /api/predict requests to profile (0 disables sampling)
+PROFILE_RATE = float(os.environ.get('ECHOTYPE_PROFILE_RATE', 0))
+# How often the sampler thread records the stacks of profiled requests
+PROFILE_INTERVAL_MS = float(os.environ.get('ECHOTYPE_PROFILE_INTERVAL_MS', 5))
+# Unlocks the admin routes and the per-request profile header when set
+ADMIN_TOKEN = os.environ.get('ECHOTYPE_ADMIN_TOKEN', '')
+
+PROFILE_HEADER = 'X-EchoType-Profile'
+ADMIN_HEADER = 'X-EchoType-Admin-Token'
+
+def frame_label(frame):
+    """'module:function' name for one stack frame"""
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+def collapse_stack(frame):
+    """Root-first 'a;b;c' stack, the format flamegraph.pl and speedscope read"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+class SamplingProfiler:
+    """
+    Statistical profiler for selected requests
+
+    Threads register themselves with profile() for the duration of a
+    request. A background thread wakes every `interval` seconds while at
+    least one request is registered, grabs the current stack of each
+    registered thread and counts it. Threads that are not registered cost
+    nothing, and the sampler sleeps when no request is being profiled.
+
+    Args:
+        interval: Seconds between samples
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.requests = 0
+        self._active = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    @contextmanager
+    def profile(self):
+        """Sample the calling thread until the block exits"""
+        self._ensure_thread()
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._active.add(thread_id)
+            self.requests += 1
+        self._wake.set()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active.discard(thread_id)
+                if not self._active:
+                    self._wake.clear()
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+
+            with self._lock:
+                active = list(self._active)
+            if not active:
+                continue
+
+            frames = sys._current_frames()
+            collapsed = [collapse_stack(frames[tid]) for tid in active if tid in frames]
+            with self._lock:
+                self.stacks.update(collapsed)
+                self.samples += len(collapsed)
+
+    def collapsed(self):
+        """Aggregated stacks as 'frame;frame;frame count' lines, hottest first"""
+        with self._lock:
+            stacks = self.stacks.most_common()
+        return ''.join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+            self.requests = 0
+
+    def stats(self):
+        return {
+            'interval_ms': self.interval * 1000,
+            'rate': PROFILE_RATE,
+            'requests': self.requests,
+            'samples': self.samples,
+            'stacks': len(self.stacks)
+        }
+
+profiler = SamplingProfiler(PROFILE_INTERVAL_MS / 1000)
+
+def is_admin(token):
+    """True when admin routes are enabled and the token matches"""
+    # compare_digest rejects non-ASCII str, so compare the encoded bytes
+    return bool(ADMIN_TOKEN) and hmac.compare_digest((token or '').encode(), ADMIN_TOKEN.encode())
+
+def should_profile(header_token):
+    """Profile when an admin asked for it, or when this request is sampled"""
+    if header_token is not None and is_admin(header_token):
+        return True
+    return PROFILE_RATE > 0 and random.random() < PROFILE_RATE
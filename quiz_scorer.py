@@ -1,10 +1,162 @@
 import json
+import os
+import threading
+
+import numpy as np
+
+from cache import cache_from_env
+
+DIMENSIONS = ['I-E', 'N-S', 'T-F', 'J-P']
+QUESTIONS_PATH = 'questions.json'
 
 def load_questions():
     """Load questions from JSON file"""
-    with open('questions.json', 'r') as f:
+    with open(QUESTIONS_PATH, 'r') as f:
         return json.load(f)
 
+class CompiledTest:
+    """
+    Precomputed layout of one test type
+
+    Attributes:
+        test_type: 'short' or 'full'
+        questions: List of question objects in presentation order
+        reverse: Tuple of booleans, one per answer slot
+        slots: Dict mapping dimension -> (start, stop) answer offsets
+        slot_dimensions: Tuple with the DIMENSIONS index of every answer slot
+        reverse_mask: Boolean array version of `reverse`
+        dim_starts: Array of the first answer offset of each dimension
+        dim_counts: Array with the number of questions in each dimension
+    """
+
+    def __init__(self, test_type, questions_data):
+        self.test_type = test_type
+        questions_per_dim = questions_data['test_types'][test_type]['questions_per_dimension']
+
+        questions = []
+        slots = {}
+        for dimension in DIMENSIONS:
+            dim_questions = questions_data[dimension]
+
+            # Filter by test type
+            if test_type == 'short':
+                dim_qs = [q for q in dim_questions if q['category'] == 'short']
+            else:
+                # Full test includes all questions
+                dim_qs = dim_questions[:questions_per_dim]
+
+            slots[dimension] = (len(questions), len(questions) + len(dim_qs))
+            questions.extend(dim_qs)
+
+        self.questions = questions
+        self.reverse = tuple(bool(q['reverse']) for q in questions)
+        self.slots = slots
+        self.slot_dimensions = tuple(
+            d for d, dimension in enumerate(DIMENSIONS) for _ in range(slots[dimension][0], slots[dimension][1])
+        )
+
+        # Array forms used by score_quiz_batch
+        self.reverse_mask = np.array(self.reverse, dtype=bool)
+        self.dim_starts = np.array([slots[d][0] for d in DIMENSIONS], dtype=np.intp)
+        self.dim_counts = np.array([slots[d][1] - slots[d][0] for d in DIMENSIONS], dtype=np.int64)
+
+    @property
+    def num_questions(self):
+        return len(self.questions)
+
+class QuestionBank:
+    """
+    In-memory question bank compiled once from questions.json
+
+    The file is only re-read when its modification time changes, so
+    requests never pay for disk I/O or JSON parsing. `version` goes up on
+    every reload so cached scores from an older bank are never reused.
+    """
+
+    def __init__(self, path=QUESTIONS_PATH):
+        self.path = path
+        self._mtime = None
+        self._tests = {}
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def _reload_if_changed(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            with open(self.path, 'r') as f:
+                questions_data = json.load(f)
+            self._tests = {
+                test_type: CompiledTest(test_type, questions_data)
+                for test_type in questions_data['test_types']
+            }
+            self._mtime = mtime
+            self.version += 1
+
+    def get(self, test_type='short'):
+        """
+        Get the compiled layout for a test type
+
+        Args:
+            test_type: 'short' or 'full'
+
+        Returns:
+            CompiledTest instance
+        """
+        self._reload_if_changed()
+        return self._tests[test_type]
+
+    def test_types(self):
+        self._reload_if_changed()
+        return list(self._tests)
+
+_question_bank = QuestionBank()
+
+# Scores keyed by (test_type, bank version, answers tuple)
+quiz_cache = cache_from_env('ECHOTYPE_QUIZ_CACHE', 16384)
+
+def get_question_bank():
+    """Return the shared, lazily compiled question bank"""
+    return _question_bank
+
+def score_quiz_batch(answers_matrix, test_type='short'):
+    """
+    Score many answer sheets at once with array operations
+    
+    Args:
+        answers_matrix: (N x Q) array-like of integers (1-5), one row per respondent
+        test_type: 'short' or 'full'
+    
+    Returns:
+        (N x 4) float64 array of scores (0-1) in 'I-E', 'N-S', 'T-F', 'J-P' order
+    """
+    compiled = get_question_bank().get(test_type)
+    num_questions = compiled.num_questions
+    
+    answers = np.asarray(answers_matrix)
+    if answers.ndim != 2:
+        raise ValueError('answers_matrix must be a 2-D array')
+    if answers.shape[1] < num_questions:
+        raise ValueError(
+            f'{test_type} test needs {num_questions} answers, got {answers.shape[1]}'
+        )
+    
+    # Widen so that 6 - answer cannot wrap around for uint8 input
+    answers = answers[:, :num_questions].astype(np.int64)
+    
+    # Reverse scoring: 1→5, 2→4, 3→3, 4→2, 5→1
+    item_scores = np.where(compiled.reverse_mask, 6 - answers, answers)
+    totals = np.add.reduceat(item_scores, compiled.dim_starts, axis=1)
+    
+    # Normalize to 0-1 scale
+    # Score ranges from (num_questions * 1) to (num_questions * 5)
+    counts = compiled.dim_counts
+    return (totals - counts) / (counts * 4)
+
 def score_quiz(answers, test_type='short'):
     """
     Score quiz answers with 5-point Likert scale
@@ -16,59 +168,18 @@ def score_quiz(answers, test_type='short'):
     Returns:
         Dictionary with probabilities (0-1) for each dimension
     """
-    questions_data = load_questions()
-    
-    # Get the right questions based on test type
-    questions_per_dim = questions_data['test_types'][test_type]['questions_per_dimension']
-    
-    # Build question list
-    all_questions = []
-    for dimension in ['I-E', 'N-S', 'T-F', 'J-P']:
-        dim_questions = questions_data[dimension]
-        
-        # Filter by test type
-        if test_type == 'short':
-            dim_qs = [q for q in dim_questions if q['category'] == 'short']
-        else:
-            # Full test includes all questions
-            dim_qs = dim_questions[:questions_per_dim]
-        
-        all_questions.extend(dim_qs)
-    
-    # Calculate scores for each dimension
-    scores = {}
-    answer_index = 0
-    
-    for dimension in ['I-E', 'N-S', 'T-F', 'J-P']:
-        dim_questions = [q for q in all_questions if q['dimension'] == dimension]
-        total_score = 0
-        
-        for question in dim_questions:
-            user_answer = answers[answer_index]
-            answer_index += 1
-            
-            # Convert 1-5 scale to score
-            # 1 = Strongly Disagree, 5 = Strongly Agree
-            # If reverse=True, flip the scoring
-            if question['reverse']:
-                # Reverse scoring: 1→5, 2→4, 3→3, 4→2, 5→1
-                score = 6 - user_answer
-            else:
-                score = user_answer
-            
-            total_score += score
-        
-        # Normalize to 0-1 scale
-        # Score ranges from (num_questions * 1) to (num_questions * 5)
-        # We want 1 to map to 0 and 5 to map to 1
-        num_questions = len(dim_questions)
-        min_possible = num_questions * 1
-        max_possible = num_questions * 5
-        
-        normalized = (total_score - min_possible) / (max_possible - min_possible)
-        scores[dimension] = normalized
-    
-    return scores
+    bank = get_question_bank()
+    compiled = bank.get(test_type)
+    # Only the test's own answers are scored, so extras must not grow or split the key
+    key = (test_type, bank.version, tuple(answers[:compiled.num_questions]))
+    
+    scores = quiz_cache.get(key)
+    if scores is None:
+        row = score_quiz_batch([answers], test_type)[0]
+        scores = {dimension: float(score) for dimension, score in zip(DIMENSIONS, row)}
+        quiz_cache.set(key, scores)
+    
+    return dict(scores)
 
 def get_question_order(test_type='short'):
     """
@@ -80,22 +191,7 @@ def get_question_order(test_type='short'):
     Returns:
         List of question objects in presentation order
     """
-    questions_data = load_questions()
-    questions_per_dim = questions_data['test_types'][test_type]['questions_per_dimension']
-    
-    ordered_questions = []
-    
-    for dimension in ['I-E', 'N-S', 'T-F', 'J-P']:
-        dim_questions = questions_data[dimension]
-        
-        if test_type == 'short':
-            dim_qs = [q for q in dim_questions if q['category'] == 'short']
-        else:
-            dim_qs = dim_questions[:questions_per_dim]
-        
-        ordered_questions.extend(dim_qs)
-    
-    return ordered_questions
+    return list(get_question_bank().get(test_type).questions)
 
 # Test the scorer
 if __name__ == "__main__":
@@ -0,0 +1,174 @@
+import json
+import os
+import secrets
+
+from combiner import ANSWER_TYPES, VALID_ANSWERS
+from quiz_scorer import DIMENSIONS, get_question_bank
+from session_store import store_from_env
+
+# Set to a file path to keep quiz sessions in SQLite, which survives
+# restarts and is shared by every worker; otherwise they live in memory
+QUIZ_SESSION_DB = os.environ.get('ECHOTYPE_QUIZ_SESSION_DB')
+# ECHOTYPE_QUIZ_SESSIONS_TTL (default a day) and _SIZE tune either backend
+
+def layout_key(compiled):
+    """
+    Fingerprint of the answer slots of a compiled test
+
+    A session's running sums are only valid against the slot order and
+    reverse flags they were built with. Unlike the bank version this is
+    the same in every process, so SQLite sessions can be resumed anywhere.
+    """
+    return hash((compiled.reverse, compiled.slot_dimensions))
+
+class QuizSession:
+    """
+    Answers given so far plus running per-dimension sums
+
+    answer() adjusts the sums of one dimension by the change in that
+    question's item score, so each answer costs O(1) however long the
+    test is, and scores() never walks the answers.
+
+    Attributes:
+        test_type: 'short' or 'full'
+        layout: layout_key() of the test when the session started
+        answers: bytearray with one 1-5 answer per slot, 0 if unanswered
+        totals: Sum of item scores (reverse flags applied) per dimension
+        answered: Number of answered questions per dimension
+    """
+
+    __slots__ = ('test_type', 'layout', 'answers', 'totals', 'answered')
+
+    def __init__(self, test_type, layout, answers, totals=None, answered=None):
+        self.test_type = test_type
+        self.layout = layout
+        self.answers = answers
+        self.totals = totals or [0] * len(DIMENSIONS)
+        self.answered = answered or [0] * len(DIMENSIONS)
+
+    @classmethod
+    def start(cls, compiled):
+        return cls(compiled.test_type, layout_key(compiled), bytearray(compiled.num_questions))
+
+    def answer(self, compiled, index, value):
+        """Record (or change) the answer to question `index`"""
+        dimension = compiled.slot_dimensions[index]
+        reverse = compiled.reverse[index]
+
+        previous = self.answers[index]
+        if previous:
+            self.totals[dimension] -= 6 - previous if reverse else previous
+        else:
+            self.answered[dimension] += 1
+
+        self.totals[dimension] += 6 - value if reverse else value
+        self.answers[index] = value
+
+    @property
+    def num_answered(self):
+        return sum(self.answered)
+
+    @property
+    def complete(self):
+        return self.num_answered == len(self.answers)
+
+    def scores(self):
+        """
+        Dimension scores (0-1) from the answers given so far
+
+        Each dimension is normalized over its answered questions only, the
+        same way score_quiz normalizes over all of them, so a complete
+        session gives exactly the score_quiz result. A dimension with no
+        answers yet is 0.5.
+        """
+        return {
+            dimension: (total - count) / (count * 4) if count else 0.5
+            for dimension, total, count in zip(DIMENSIONS, self.totals, self.answered)
+        }
+
+    def progress(self):
+        """Counts and scores without the answers themselves; O(1)"""
+        num_answered = self.num_answered
+        return {
+            'test_type': self.test_type,
+            'answered': num_answered,
+            'total_questions': len(self.answers),
+            'complete': num_answered == len(self.answers),
+            'scores': self.scores()
+        }
+
+    def to_bytes(self):
+        """Serialized form for session stores"""
+        return json.dumps([self.test_type, self.layout, self.answers.hex(), self.totals, self.answered]).encode()
+
+    @classmethod
+    def from_bytes(cls, data):
+        test_type, layout, answers, totals, answered = json.loads(data)
+        return cls(test_type, layout, bytearray.fromhex(answers), totals, answered)
+
+quiz_sessions = store_from_env(
+    QuizSession, 'ECHOTYPE_QUIZ_SESSIONS', 'quiz_sessions', 10000, 86400, path=QUIZ_SESSION_DB
+)
+
+class QuizSessionError(ValueError):
+    """An answer or session the current question bank cannot accept"""
+
+class QuestionsChangedError(QuizSessionError):
+    """questions.json changed the session's test after it started"""
+
+def create_quiz_session(test_type):
+    """Start an empty quiz session and return its id"""
+    session_id = secrets.token_urlsafe(16)
+    quiz_sessions.put(session_id, QuizSession.start(get_question_bank().get(test_type)))
+    return session_id
+
+def check_layout(session):
+    """Return the session's compiled test, or raise if questions.json changed it"""
+    compiled = get_question_bank().get(session.test_type)
+    if session.layout != layout_key(compiled):
+        raise QuestionsChangedError('The questions changed since this session started; please start a new one')
+    return compiled
+
+def get_quiz_session(session_id):
+    """
+    Return a snapshot of the session, or None when it does not exist or has expired
+
+    Raises:
+        QuestionsChangedError: questions.json changed the session's test since it started
+    """
+    session = quiz_sessions.get(session_id)
+    if session is not None:
+        check_layout(session)
+    return session
+
+def answer_question(session_id, index, value):
+    """
+    Record one answer and return the session's updated progress()
+
+    Args:
+        session_id: Id returned by create_quiz_session
+        index: Position of the question in /api/questions order
+        value: Integer answer between 1 and 5
+
+    Returns:
+        QuizSession.progress() dict, or None when the session does not exist
+        or has expired
+
+    Raises:
+        QuizSessionError: index or value is out of range, or the questions changed
+    """
+    def change(session):
+        compiled = check_layout(session)
+        if type(index) is not int or not 0 <= index < compiled.num_questions:
+            raise QuizSessionError(f'Question index must be an integer between 0 and {compiled.num_questions - 1}')
+        if type(value) not in ANSWER_TYPES or value not in VALID_ANSWERS:
+            raise QuizSessionError('Answer must be an integer between 1 and 5')
+
+        session.answer(compiled, index, value)
+        return session.progress()
+
+    return quiz_sessions.update(session_id, change)
+
+def end_quiz_session(session_id):
+    """Forget a session; returns False if it did not exist"""
+    return quiz_sessions.delete(session_id)
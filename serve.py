@@ -0,0 +1,158 @@
+import argparse
+import gc
+import os
+import resource
+import shutil
+import sys
+import tempfile
+
+# Production settings, overridable on the command line
+WORKERS = int(os.environ.get('ECHOTYPE_WORKERS', os.cpu_count() or 1))
+THREADS = int(os.environ.get('ECHOTYPE_THREADS', 4))
+BIND = os.environ.get('ECHOTYPE_BIND', '127.0.0.1:5000')
+
+def memory_usage():
+    """
+    Memory of the current process in MB
+
+    rss counts every resident page, shared or not. pss splits shared pages
+    between the processes mapping them, and private is what this process
+    alone holds, i.e. what one more worker really costs. Outside Linux only
+    the peak RSS is available.
+    """
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            fields = {}
+            for line in f:
+                name, _, value = line.partition(':')
+                if value.strip().endswith('kB'):
+                    fields[name] = value
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return {'peak_rss': peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)}
+
+    def mb(*names):
+        return sum(int(fields[name].split()[0]) for name in names) / 1024
+
+    return {
+        'rss': mb('Rss'),
+        'pss': mb('Pss'),
+        'shared': mb('Shared_Clean', 'Shared_Dirty'),
+        'private': mb('Private_Clean', 'Private_Dirty')
+    }
+
+def format_memory(usage):
+    return ', '.join(f"{name} {value:.1f} MB" for name, value in usage.items())
+
+def preload():
+    """
+    Load everything workers would otherwise load separately, then freeze the gc
+
+    Runs in the master before forking, so the models, stopwords and
+    pre-rendered questions sit in pages the workers share copy-on-write.
+    gc.freeze() moves these objects out of the collector's reach; without
+    it the first collection in each worker writes to their headers and
+    un-shares the pages.
+    """
+    from app import app
+    from predict import get_text_model
+
+    get_text_model()
+    gc.collect()
+    gc.freeze()
+    return app
+
+def metrics_multiprocess():
+    """
+    Point every worker at one metrics directory before app.py is imported
+
+    Each worker keeps its own registry, so a scrape would otherwise see the
+    counters of whichever worker answered it. Workers write snapshots to
+    ECHOTYPE_METRICS_DIR and /api/metrics merges them. Snapshots left by a
+    previous run are removed so counters start from zero.
+
+    Returns:
+        (directory, created): created is True for a temporary directory
+        made here, which the master removes on shutdown
+    """
+    directory = os.environ.get('ECHOTYPE_METRICS_DIR')
+    created = not directory
+    if created:
+        directory = os.environ['ECHOTYPE_METRICS_DIR'] = tempfile.mkdtemp(prefix='echotype-metrics-')
+    os.makedirs(directory, exist_ok=True)
+
+    from metrics import snapshot_files
+
+    for _, path in snapshot_files(directory):
+        os.remove(path)
+    return directory, created
+
+def post_worker_init(worker):
+    from metrics import METRICS_DIR, registry
+
+    if METRICS_DIR:
+        registry.start_flusher(METRICS_DIR)
+    worker.log.info(f"Worker {worker.pid} ready: {format_memory(memory_usage())}")
+
+def worker_exit(server, worker):
+    from metrics import METRICS_DIR, registry
+
+    # Keep the final counts of a worker that is restarted or shut down
+    if METRICS_DIR:
+        registry.write_snapshot(METRICS_DIR)
+
+def run(workers=WORKERS, threads=THREADS, bind=BIND):
+    """Serve app.py with gunicorn: models loaded once in the master, then forked"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        sys.exit("serve.py needs gunicorn: pip install gunicorn")
+
+    metrics_dir, metrics_dir_created = metrics_multiprocess() if workers > 1 else (None, False)
+    if metrics_dir:
+        print(f"📈 Merging worker metrics in {metrics_dir}")
+
+    def on_exit(server):
+        # Runs in the master only; the workers share this directory
+        if metrics_dir_created:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+    app = preload()
+    print(f"📦 Models loaded in master {os.getpid()}: {format_memory(memory_usage())}")
+    print(f"🚀 Serving on http://{bind} with {workers} workers × {threads} threads")
+
+    if workers > 1:
+        from quiz_sessions import quiz_sessions
+        from sessions import text_sessions
+
+        for kind, store, variable in [('Text', text_sessions, 'ECHOTYPE_TEXT_SESSION_DB'),
+                                      ('Quiz', quiz_sessions, 'ECHOTYPE_QUIZ_SESSION_DB')]:
+            if store.name == 'memory':
+                print(f"⚠️  {kind} sessions are per worker; set {variable} to share them")
+
+    class EchoTypeServer(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', bind)
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            # Threads need gthread; with one thread the plain sync worker is cheaper
+            self.cfg.set('worker_class', 'gthread' if threads > 1 else 'sync')
+            self.cfg.set('preload_app', True)
+            self.cfg.set('post_worker_init', post_worker_init)
+            self.cfg.set('worker_exit', worker_exit)
+            self.cfg.set('on_exit', on_exit)
+
+        def load(self):
+            return app
+
+    EchoTypeServer().run()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='EchoType production server (prefork, shared model memory)')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='Worker processes (ECHOTYPE_WORKERS)')
+    parser.add_argument('--threads', type=int, default=THREADS, help='Threads per worker (ECHOTYPE_THREADS)')
+    parser.add_argument('--bind', default=BIND, help='Address to listen on (ECHOTYPE_BIND)')
+    args = parser.parse_args()
+
+    run(args.workers, args.threads, args.bind)
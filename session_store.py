@@ -0,0 +1,165 @@
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+
+from cache import cache_from_env
+
+class MemorySessionStore:
+    """
+    Sessions in this process, in an LRUCache with a time to live
+
+    Only the worker that created a session can see it; use SQLite when
+    several workers serve the same clients.
+    """
+
+    name = 'memory'
+    LOCK_STRIPES = 64
+
+    def __init__(self, session_class, prefix, maxsize, ttl):
+        self.session_class = session_class
+        self.cache = cache_from_env(prefix, maxsize, default_ttl=ttl)
+        # Updates of one session are serialized; different sessions rarely share a stripe
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+
+    def _lock(self, session_id):
+        return self._locks[hash(session_id) % self.LOCK_STRIPES]
+
+    def get(self, session_id):
+        """Snapshot of the session, safe to read while it is being updated"""
+        with self._lock(session_id):
+            session = self.cache.get(session_id)
+            return session and self.session_class.from_bytes(session.to_bytes())
+
+    def put(self, session_id, session):
+        self.cache.set(session_id, session)
+
+    def update(self, session_id, change):
+        """
+        Apply change(session) to the stored session atomically
+
+        Returns:
+            What change returned, or None when the session does not exist
+        """
+        with self._lock(session_id):
+            session = self.cache.get(session_id)
+            if session is None:
+                return None
+            result = change(session)
+            # Re-storing also refreshes the session's time to live
+            self.cache.set(session_id, session)
+            return result
+
+    def delete(self, session_id):
+        return self.cache.delete(session_id)
+
+    def __len__(self):
+        return len(self.cache)
+
+class SQLiteSessionStore:
+    """
+    Sessions in a SQLite file, shared by every worker process
+
+    Each thread opens its own connection, and so does each forked worker
+    (connections must not cross a fork). update() reads and writes a
+    session inside one BEGIN IMMEDIATE transaction, so updates posted to
+    different workers at once are never lost. Expired rows are ignored on
+    read and deleted every PURGE_EVERY writes.
+    """
+
+    name = 'sqlite'
+    PURGE_EVERY = 1000
+
+    def __init__(self, session_class, path, table, ttl):
+        self.session_class = session_class
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        self._connect().execute(
+            f'CREATE TABLE IF NOT EXISTS {table} (id TEXT PRIMARY KEY, state BLOB, expires_at REAL)'
+        )
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            # Autocommit; transactions are opened explicitly in _transaction
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Write transaction holding SQLite's write lock from the start"""
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def _select(self, connection, session_id):
+        row = connection.execute(
+            f'SELECT state FROM {self.table} WHERE id = ? AND expires_at > ?', (session_id, time.time())
+        ).fetchone()
+        return self.session_class.from_bytes(row[0]) if row else None
+
+    def _write(self, connection, session_id, session):
+        now = time.time()
+        connection.execute(
+            f'INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?)',
+            (session_id, session.to_bytes(), now + self.ttl)
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            connection.execute(f'DELETE FROM {self.table} WHERE expires_at <= ?', (now,))
+
+    def get(self, session_id):
+        return self._select(self._connect(), session_id)
+
+    def put(self, session_id, session):
+        with self._transaction() as connection:
+            self._write(connection, session_id, session)
+
+    def update(self, session_id, change):
+        """Same contract as MemorySessionStore.update, atomic across processes"""
+        with self._transaction() as connection:
+            session = self._select(connection, session_id)
+            if session is None:
+                return None
+            result = change(session)
+            self._write(connection, session_id, session)
+            return result
+
+    def delete(self, session_id):
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                f'DELETE FROM {self.table} WHERE id = ? AND expires_at > ?', (session_id, time.time())
+            )
+        return cursor.rowcount > 0
+
+    def __len__(self):
+        return self._connect().execute(
+            f'SELECT COUNT(*) FROM {self.table} WHERE expires_at > ?', (time.time(),)
+        ).fetchone()[0]
+
+def store_from_env(session_class, prefix, table, default_size, default_ttl, path=None):
+    """
+    Session store for one kind of session
+
+    With a SQLite file path, sessions are shared between workers and
+    survive restarts; without one they stay in memory. <prefix>_SIZE caps
+    the in-memory store and <prefix>_TTL sets the idle seconds before a
+    session expires, for both backends.
+    """
+    ttl = float(os.environ.get(f'{prefix}_TTL', default_ttl))
+    if path:
+        return SQLiteSessionStore(session_class, path, table, ttl)
+    return MemorySessionStore(session_class, prefix, default_size, ttl)
@@ -0,0 +1,193 @@
+import json
+import os
+import re
+import secrets
+from collections import Counter
+
+import numpy as np
+
+from predict import get_text_model
+from session_store import store_from_env
+from tokenizer import tokenize
+
+# A trailing run of non-whitespace may be a word the user is still typing
+_TRAILING_WORD = re.compile(r"\S+$")
+
+# Set to a file path to keep text sessions in SQLite, shared by every
+# worker; in memory, follow-up requests must reach the same process
+TEXT_SESSION_DB = os.environ.get('ECHOTYPE_TEXT_SESSION_DB')
+# Longest text accepted in one request, so one update stays cheap
+MAX_TEXT_CHARS = int(os.environ.get('ECHOTYPE_TEXT_SESSION_MAX_CHARS', 20000))
+
+class TextSession:
+    """
+    Running term counts for text that arrives in pieces
+
+    Each append() cleans only the new text and updates the counts of the
+    terms it contains. With raw tf and l2 norm (the settings data.py
+    trains with) the session also keeps the running dot product of its
+    TF-IDF vector with the coefficients and the running sum of squared
+    weights, so an append costs O(new text) and rescoring O(1). Other
+    settings rebuild the TF-IDF row from the counts instead, which is
+    O(distinct terms) and still independent of the text length.
+
+    The last word is held back until whitespace follows it, so a word
+    split across two appends is counted once, whole.
+
+    Sessions kept in SQLite are also loaded and saved on every append,
+    which adds O(distinct terms) of (de)serialization.
+
+    Attributes:
+        counts: Counter of feature index -> term count
+        tail: Raw text of the word still being typed
+        length: Characters appended so far
+        content_length: Length of the text so far with surrounding
+            whitespace stripped, as has_usable_text measures it
+    """
+
+    def __init__(self, num_dimensions=4):
+        self.counts = Counter()
+        self.tail = ''
+        self.length = 0
+        self.content_length = 0
+        # Whitespace after the last non-space character, not yet counted
+        self.trailing_space = 0
+        self.dot = np.zeros(num_dimensions)
+        self.sumsq = 0.0
+
+    def to_bytes(self):
+        """Serialized form for session stores"""
+        return json.dumps({
+            'counts': list(self.counts.items()),
+            'tail': self.tail,
+            'length': self.length,
+            'content_length': self.content_length,
+            'trailing_space': self.trailing_space,
+            'dot': self.dot.tolist(),
+            'sumsq': self.sumsq
+        }).encode()
+
+    @classmethod
+    def from_bytes(cls, data):
+        state = json.loads(data)
+        session = cls(len(state['dot']))
+        session.counts = Counter(dict(state['counts']))
+        session.tail = state['tail']
+        session.length = state['length']
+        session.content_length = state['content_length']
+        session.trailing_space = state['trailing_space']
+        session.dot = np.array(state['dot'])
+        session.sumsq = state['sumsq']
+        return session
+
+    def append(self, model, text):
+        """Clean and count newly typed text"""
+        self.length += len(text)
+        # Leading whitespace never counts; inner whitespace counts once text follows it
+        body = text if self.content_length else text.lstrip()
+        stripped = body.rstrip()
+        if stripped:
+            self.content_length += self.trailing_space + len(stripped)
+            self.trailing_space = len(body) - len(stripped)
+        elif self.content_length:
+            self.trailing_space += len(body)
+
+        text = self.tail + text
+        match = _TRAILING_WORD.search(text)
+        complete, self.tail = (text[:match.start()], match.group()) if match else (text, '')
+
+        new_counts = term_counts(model, complete)
+        if is_incremental(model):
+            self.dot, self.sumsq = add_counts(model, self.counts, new_counts, self.dot, self.sumsq)
+        self.counts.update(new_counts)
+
+    def probabilities(self, model):
+        """
+        P(first trait) per dimension for everything typed so far
+
+        The held-back last word is scored too, without being committed.
+        """
+        from scipy.special import expit
+
+        pending = term_counts(model, self.tail) if self.tail else Counter()
+
+        if is_incremental(model):
+            dot, sumsq = add_counts(model, self.counts, pending, self.dot, self.sumsq)
+            return expit(dot / (np.sqrt(sumsq) or 1.0) + model.intercept)
+
+        import scipy.sparse as sp
+
+        counts = self.counts + pending
+        indices = np.array(sorted(counts), dtype=np.int32)
+        values = np.array([counts[index] for index in indices], dtype=np.float64)
+        row = sp.csr_matrix((values, indices, [0, len(indices)]), shape=(1, model.num_features))
+        return model.predict_proba(model.tfidf(row))[0]
+
+def is_incremental(model):
+    """Whether running dot/sumsq totals reproduce the model's TF-IDF row"""
+    return model.norm == 'l2' and not model.sublinear_tf
+
+def term_counts(model, text):
+    """Counter of feature index -> occurrences for in-vocabulary tokens"""
+    vocabulary = model.vocabulary
+    return Counter(index for index in map(vocabulary.get, tokenize(text)) if index is not None)
+
+def add_counts(model, counts, new_counts, dot, sumsq):
+    """
+    Update the running totals for terms added on top of counts
+
+    A term going from c to c + a adds a * w * coef[term] to the dot product
+    and ((c + a)^2 - c^2) * w^2 to the squared norm, where w is its idf.
+
+    Returns:
+        Tuple of (new dot array, new sumsq); the inputs are not modified
+    """
+    dot = dot.copy()
+    for index, added in new_counts.items():
+        before = counts[index]
+        weight = float(model.idf[index]) if model.idf is not None else 1.0
+        dot += (added * weight) * model.coef_rows(index)
+        sumsq += added * (2 * before + added) * weight * weight
+    return dot, sumsq
+
+# Live text sessions by id; ECHOTYPE_TEXT_SESSIONS_SIZE/_TTL tune them
+text_sessions = store_from_env(TextSession, 'ECHOTYPE_TEXT_SESSIONS', 'text_sessions', 10000, 1800,
+                               path=TEXT_SESSION_DB)
+
+def create_session():
+    """Start an empty text session and return its id"""
+    session_id = secrets.token_urlsafe(16)
+    text_sessions.put(session_id, TextSession())
+    return session_id
+
+def append_text(session_id, text):
+    """
+    Add text to a session and rescore it
+
+    Args:
+        session_id: Id returned by create_session
+        text: Newly typed text, appended to what the session already holds
+
+    Returns:
+        Tuple of (predict_mbti-style result, characters so far, stripped
+        length so far), or None when the session does not exist or has
+        expired
+    """
+    from inference import to_results
+
+    model = get_text_model()
+
+    def change(session):
+        session.append(model, text)
+        return session.probabilities(model), session.length, session.content_length
+
+    updated = text_sessions.update(session_id, change)
+    if updated is None:
+        return None
+
+    probabilities, length, content_length = updated
+    return to_results(probabilities[np.newaxis, :])[0], length, content_length
+
+def end_session(session_id):
+    """Forget a session; returns False if it did not exist"""
+    return text_sessions.delete(session_id)
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+import bulk_score
+
+def write_jsonl(path, lines):
+    path.write_text(''.join(line + '\n' for line in lines))
+    return str(path)
+
+def test_non_object_jsonl_line_gets_error_row(tmp_path):
+    input_path = write_jsonl(tmp_path / 'in.jsonl', [
+        '[1, 2, 3]',
+        json.dumps({'id': 'ok', 'answers': [3] * 20})
+    ])
+    output_path = str(tmp_path / 'out.jsonl')
+
+    processed, failed = bulk_score.run(input_path, output_path)
+
+    rows = [json.loads(line) for line in open(output_path)]
+    assert (processed, failed) == (2, 1)
+    assert 'expected a JSON object' in rows[0]['error']
+    assert rows[1]['id'] == 'ok' and rows[1]['type'] and not rows[1]['error']
+
+def test_unsupported_answers_type_gets_error_row(tmp_path):
+    input_path = write_jsonl(tmp_path / 'in.jsonl', [
+        json.dumps({'id': 'bad', 'answers': {'a': 1}}),
+        json.dumps({'id': 'ok', 'answers': [3] * 20})
+    ])
+    output_path = str(tmp_path / 'out.jsonl')
+
+    processed, failed = bulk_score.run(input_path, output_path)
+
+    rows = [json.loads(line) for line in open(output_path)]
+    assert (processed, failed) == (2, 1)
+    assert rows[0]['id'] == 'bad' and rows[0]['error'].startswith('Invalid answers')
+    assert rows[1]['type'] and not rows[1]['error']
+
+def test_score_chunk_rejects_non_dict_records():
+    rows = bulk_score.score_chunk([[1, 2, 3], 7], first_index=0)
+    assert all(row['error'] for row in rows)
+
+@pytest.mark.parametrize('value', [{'a': 1}, 5, 2.5])
+def test_parse_answers_rejects_other_types(value):
+    with pytest.raises(ValueError):
+        bulk_score.parse_answers(value)
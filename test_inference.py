@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from inference import DIMENSIONS, LinearTextModel
+
+WORDS = [f'word{chr(97 + i)}{chr(97 + j)}' for i in range(26) for j in range(8)]
+
+@pytest.fixture(scope='module')
+def fitted():
+    rng = np.random.default_rng(0)
+    texts = [' '.join(rng.choice(WORDS, size=rng.integers(5, 60))) for _ in range(300)]
+    vectorizer = TfidfVectorizer(max_features=150, min_df=2, max_df=0.9)
+    X = vectorizer.fit_transform(texts)
+    models = {
+        dim: LogisticRegression(max_iter=1000).fit(X, rng.integers(0, 2, size=len(texts)))
+        for dim in DIMENSIONS
+    }
+    held_out = [' '.join(rng.choice(WORDS, size=rng.integers(1, 80))) for _ in range(100)]
+    return vectorizer, models, held_out
+
+def pickle_probabilities(vectorizer, models, texts):
+    X = vectorizer.transform(texts)
+    return np.column_stack([models[dim].predict_proba(X)[:, 1] for dim in DIMENSIONS])
+
+# Largest probability difference to the sklearn pipeline per coefficient storage type
+@pytest.mark.parametrize('coef_dtype, tolerance', [('float32', 1e-6), ('float16', 1e-3), ('int8', 1e-2)])
+def test_artifact_matches_pickled_models(fitted, tmp_path, coef_dtype, tolerance):
+    vectorizer, models, texts = fitted
+    LinearTextModel.from_models(vectorizer, models).save_artifact(str(tmp_path), coef_dtype)
+
+    model = LinearTextModel.from_artifact(str(tmp_path))
+    probabilities = model.predict_proba(model.transform(texts))
+
+    np.testing.assert_allclose(probabilities, pickle_probabilities(vectorizer, models, texts), atol=tolerance)
+
+@pytest.mark.parametrize('coef_dtype', ['float32', 'float16', 'int8'])
+def test_artifact_matches_in_memory_quantized_model(fitted, tmp_path, coef_dtype):
+    vectorizer, models, texts = fitted
+    model = LinearTextModel.from_models(vectorizer, models)
+    model.save_artifact(str(tmp_path), coef_dtype)
+
+    expected = model.quantized(coef_dtype)
+    loaded = LinearTextModel.from_artifact(str(tmp_path))
+    features = model.transform(texts)
+
+    np.testing.assert_allclose(loaded.predict_proba(features), expected.predict_proba(features), rtol=1e-12)
+
+def test_token_path_matches_vectorizer(fitted):
+    vectorizer, models, texts = fitted
+    model = LinearTextModel.from_models(vectorizer, models)
+
+    tokens = model.transform_tokens([text.split() for text in texts])
+
+    np.testing.assert_allclose(tokens.toarray(), vectorizer.transform(texts).toarray(), rtol=1e-12)
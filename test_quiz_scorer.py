@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+from quiz_scorer import DIMENSIONS, get_question_bank, score_quiz, score_quiz_batch
+
+@pytest.mark.parametrize('test_type', ['short', 'full'])
+def test_batch_matches_scalar_scoring(test_type):
+    num_questions = get_question_bank().get(test_type).num_questions
+    sheets = np.random.default_rng(0).integers(1, 6, size=(200, num_questions))
+
+    batch = score_quiz_batch(sheets, test_type)
+
+    for sheet, row in zip(sheets.tolist(), batch):
+        scores = score_quiz(sheet, test_type)
+        assert [scores[dimension] for dimension in DIMENSIONS] == row.tolist()
+
+def test_extra_answers_do_not_change_scores():
+    sheet = np.random.default_rng(1).integers(1, 6, size=20).tolist()
+    assert score_quiz(sheet + [1] * 50, 'short') == score_quiz(sheet, 'short')
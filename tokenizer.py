@@ -0,0 +1,78 @@
+import re
+import string
+
+# Compiled once instead of on every call
+URL_PATTERN = re.compile(r"http\S+")
+NON_LETTER_PATTERN = re.compile(r"[^a-zA-Z\s]")
+
+# ASCII bytes that NON_LETTER_PATTERN would remove, for the bytes.translate fast path
+_KEEP_ASCII = set(string.ascii_letters) | {chr(c) for c in range(128) if chr(c).isspace()}
+_DELETE_ASCII = bytes(c for c in range(128) if chr(c) not in _KEEP_ASCII)
+
+_stop_words = None
+
+def get_stop_words():
+    """Load the NLTK English stopwords once, downloading them if needed"""
+    global _stop_words
+    if _stop_words is None:
+        import nltk
+        from nltk.corpus import stopwords
+
+        try:
+            _stop_words = frozenset(stopwords.words('english'))
+        except LookupError:
+            nltk.download('stopwords')
+            _stop_words = frozenset(stopwords.words('english'))
+    return _stop_words
+
+def strip_text(text):
+    """Remove URLs and every character that is not an ASCII letter or whitespace"""
+    if 'http' in text:
+        text = URL_PATTERN.sub("", text)
+
+    # Pure-ASCII text (nearly all posts) can skip the regex engine entirely
+    if text.isascii():
+        return text.encode('ascii').translate(None, _DELETE_ASCII).decode('ascii')
+    return NON_LETTER_PATTERN.sub("", text)
+
+def tokenize(text):
+    """
+    Clean text and split it into tokens in one pass
+
+    The tokens can be handed straight to LinearTextModel.transform_tokens
+    without joining them back into a string.
+
+    Args:
+        text: Raw user text or post
+
+    Returns:
+        List of lowercase words with URLs, non-letters and stopwords removed
+    """
+    stop_words = get_stop_words()
+    return [word for word in strip_text(text).lower().split() if word not in stop_words]
+
+def clean_text(text):
+    """Clean text into a single space-separated string of tokens"""
+    return " ".join(tokenize(text))
+
+def clean_series(posts):
+    """
+    Clean a whole pandas Series of texts
+
+    Same output as posts.apply(clean_text), without the per-row apply
+    overhead.
+
+    Args:
+        posts: pandas Series of raw texts
+
+    Returns:
+        pandas Series of cleaned strings with the same index
+    """
+    import pandas as pd
+
+    stop_words = get_stop_words()
+    cleaned = [
+        " ".join([word for word in strip_text(text).lower().split() if word not in stop_words])
+        for text in posts.tolist()
+    ]
+    return pd.Series(cleaned, index=posts.index, name=posts.name)